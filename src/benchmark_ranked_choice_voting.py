@@ -0,0 +1,153 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from ranked_choice_voting import Candidate, Election
+from ranked_choice_voting_cli import load_election, save_election
+from ranked_choice_voting_synthetic import MODELS, candidate_names
+
+CHUNK_SIZE = 100000
+# save_election writes out one JSON ranking per ballot, so the JSON round trip
+# is only timed up to this many voters
+JSON_BALLOT_CAP = 5000000
+# (candidates, voters, model, truncation)
+SUITES = {
+    "quick": [
+        (3, 1000, "plackett-luce", 0.0),
+        (10, 10000, "spatial", 0.3),
+        (50, 10000, "plackett-luce", 0.5),
+    ],
+    "full": [
+        (2, 1000, "plackett-luce", 0.0),
+        (5, 100000, "spatial", 0.2),
+        (20, 1000000, "plackett-luce", 0.3),
+        (50, 1000000, "spatial", 0.5),
+        (200, 1000000, "plackett-luce", 0.5),
+        (20, 50000000, "spatial", 0.3),
+    ],
+}
+TIMED = ("add_ballot", "run_election", "save_json", "load_json")
+
+def scenario_name(candidates, voters, model, truncation):
+    return f"{model}-c{candidates}-v{voters}-t{truncation}"
+
+def build_election(candidates, voters, model, truncation, seed):
+    # Rankings are generated chunk by chunk; only the add_ballot calls are timed
+    names = candidate_names(candidates)
+    election = Election([Candidate(name) for name in names])
+    election.warn_incomplete_ballots = False
+    rankings = MODELS[model](names, voters, seed=seed, truncation=truncation)
+    elapsed = 0.0
+    while True:
+        chunk = [ranking for _, ranking in zip(range(CHUNK_SIZE), rankings)]
+        if not chunk:
+            return election, elapsed
+        start = time.perf_counter()
+        for ranking in chunk:
+            election.add_ballot(ranking)
+        elapsed += time.perf_counter() - start
+
+def run_scenario(candidates, voters, model, truncation, seed=0, measure_memory=True):
+    result = {}
+    election, result["add_ballot"] = build_election(candidates, voters, model, truncation, seed)
+    result["piles"] = len(election.ballots)
+
+    start = time.perf_counter()
+    result["winner"] = election.run_election()
+    result["run_election"] = time.perf_counter() - start
+    result["rounds"] = len(election.rounds)
+
+    if voters > JSON_BALLOT_CAP:
+        result["save_json"] = result["load_json"] = None
+    else:
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "election.json")
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                save_election(election, filename)
+                result["save_json"] = time.perf_counter() - start
+                start = time.perf_counter()
+                load_election(filename)
+                result["load_json"] = time.perf_counter() - start
+
+    if measure_memory:
+        # A second pass under tracemalloc, so tracing doesn't skew the timings
+        del election
+        tracemalloc.start()
+        election, _ = build_election(candidates, voters, model, truncation, seed)
+        election.run_election()
+        result["peak_memory"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result
+
+def load_history(filename):
+    if not os.path.exists(filename):
+        return {"runs": []}
+    with open(filename) as f:
+        return json.load(f)
+
+def find_regressions(previous, current, threshold, min_seconds=0.01):
+    regressions = []
+    for name, result in current.items():
+        before = previous.get(name)
+        if not before:
+            continue
+        for metric in TIMED + ("peak_memory",):
+            old, new = before.get(metric), result.get(metric)
+            if old is None or new is None:
+                continue
+            if metric != "peak_memory" and new - old < min_seconds:
+                continue
+            if new > old * (1 + threshold):
+                regressions.append((name, metric, old, new))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark ranked choice tabulation on synthetic electorates.")
+    parser.add_argument("--suite", choices=sorted(SUITES), default="quick")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--results", default="benchmark_results.json",
+                        help="JSON file the results are appended to")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="relative slowdown against the previous run that counts as a regression")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for scenario in SUITES[args.suite]:
+        name = scenario_name(*scenario)
+        results[name] = result = run_scenario(*scenario, seed=args.seed, measure_memory=not args.no_memory)
+        timings = "  ".join(f"{metric} {result[metric]:.3f}s" for metric in TIMED
+                            if result[metric] is not None)
+        memory = f"  peak {result['peak_memory'] / 2**20:.1f} MiB" if "peak_memory" in result else ""
+        print(f"{name}: {result['piles']} piles, {result['rounds']} rounds  {timings}{memory}")
+
+    history = load_history(args.results)
+    previous = {}
+    for run in history["runs"]:
+        if run["suite"] == args.suite and run["seed"] == args.seed:
+            previous = run["results"]
+    regressions = find_regressions(previous, results, args.threshold)
+    for name, metric, old, new in regressions:
+        print(f"Regression: {name} {metric} {old:.3f} -> {new:.3f}")
+
+    history["runs"].append({
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "suite": args.suite,
+        "seed": args.seed,
+        "results": results,
+    })
+    with open(args.results, "w") as f:
+        json.dump(history, f, indent=2)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
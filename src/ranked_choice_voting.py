@@ -1,21 +1,50 @@
-from collections import defaultdict
+import functools
+import time
+from array import array
+from collections import Counter, defaultdict
 
 class InvalidBallotException(Exception):
     pass
 
+class ValidationReport:
+    ERRORS = ("empty", "duplicate", "invalid_candidate")
+    WARNINGS = ("incomplete",)
+
+    def __init__(self):
+        self.total = 0
+        self.indices = {kind: array("L") for kind in self.ERRORS + self.WARNINGS}
+
+    def counts(self):
+        return {kind: len(indices) for kind, indices in self.indices.items()}
+
+    def invalid_indices(self):
+        return sorted(i for kind in self.ERRORS for i in self.indices[kind])
+
+    def is_valid(self):
+        return not any(self.indices[kind] for kind in self.ERRORS)
+
 class Candidate:
+    __slots__ = ('name', 'eliminated', 'id')
+
     def __init__(self, name):
         self.name = name
         self.eliminated = False
+        # Dense integer ID, assigned by the Election the candidate belongs to
+        self.id = None
 
 class Ballot:
-    def __init__(self, rankings):
+    __slots__ = ('rankings', 'current_rank', 'count')
+
+    # rankings is an array('H') of candidate IDs; candidates is the election's
+    # candidate list indexed by ID.
+    def __init__(self, rankings, count=1):
         self.rankings = rankings
         self.current_rank = 0
+        self.count = count
 
-    def get_next_choice(self):
+    def get_next_choice(self, candidates):
         while self.current_rank < len(self.rankings):
-            candidate = self.rankings[self.current_rank]
+            candidate = candidates[self.rankings[self.current_rank]]
             self.current_rank += 1
             if not candidate.eliminated:
                 return candidate
@@ -24,23 +53,189 @@ class Ballot:
     def has_more_choices(self):
         return self.current_rank < len(self.rankings)
 
-    def get_second_choice(self):
+    def get_second_choice(self, candidates):
         if len(self.rankings) > 1:
-            return self.rankings[1]
+            return candidates[self.rankings[1]]
         return None
 
+    def names(self, candidates):
+        return [candidates[i].name for i in self.rankings]
+
+class RoundStats:
+    __slots__ = ('wall_time', 'phases', 'ballots_touched', 'piles_touched', 'ballots_exhausted',
+                 'allocated', 'peak_memory', '_start', '_lap', '_touched', '_piles', '_exhausted',
+                 '_memory')
+
+    # Filled in by Election.run_election when collect_stats or trace_memory is
+    # set. Phase times are in seconds; memory figures are in bytes and stay
+    # None unless trace_memory is set. The ballot and pile counts are None for
+    # backends that don't track ballot movement.
+    def __init__(self, election):
+        self.phases = {}
+        self.allocated = None
+        self.peak_memory = None
+        self._touched = election._touched
+        self._piles = election._piles_touched
+        self._exhausted = election._exhausted
+        if election.trace_memory:
+            import tracemalloc
+            tracemalloc.reset_peak()
+            self._memory = tracemalloc.get_traced_memory()[0]
+        self._start = self._lap = time.perf_counter()
+
+    def lap(self, phase):
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self._lap
+        self._lap = now
+
+    def finish(self, election):
+        self.wall_time = time.perf_counter() - self._start
+        if election.tracks_ballot_movement:
+            self.ballots_touched = election._touched - self._touched
+            self.piles_touched = election._piles_touched - self._piles
+            self.ballots_exhausted = election._exhausted - self._exhausted
+        else:
+            self.ballots_touched = self.piles_touched = self.ballots_exhausted = None
+        if election.trace_memory:
+            import tracemalloc
+            current, self.peak_memory = tracemalloc.get_traced_memory()
+            self.allocated = current - self._memory
+
 class Round:
-    def __init__(self, vote_counts, eliminated_candidate=None, is_tie=False, tie_broken=False):
-        self.vote_counts = vote_counts
+    __slots__ = ('counts', 'candidates', 'eliminated_candidate', 'elected_candidate', 'is_tie', 'tie_broken',
+                 'stats', 'transfers')
+
+    # counts is an array('q') indexed by candidate ID, or array('d') for
+    # fractional STV tallies, with -1 for candidates that were no longer
+    # continuing in this round. transfers maps the ID of each candidate
+    # eliminated in the round to where its ballots went: votes by candidate
+    # ID plus a last slot for exhausted votes. It is None when the tabulator
+    # doesn't record transfers.
+    def __init__(self, counts, candidates, eliminated_candidate=None, is_tie=False, tie_broken=False,
+                 elected_candidate=None, transfers=None):
+        self.counts = counts
+        self.candidates = candidates
         self.eliminated_candidate = eliminated_candidate
+        self.elected_candidate = elected_candidate
         self.is_tie = is_tie
         self.tie_broken = tie_broken
+        self.stats = None
+        self.transfers = transfers
+
+    @classmethod
+    def from_vote_counts(cls, vote_counts, candidates, **kwargs):
+        counts = array('q', [-1]) * len(candidates)
+        for candidate, votes in vote_counts.items():
+            counts[candidate.id] = votes
+        return cls(counts, candidates, **kwargs)
+
+    @property
+    def vote_counts(self):
+        return {candidate: votes for candidate, votes in zip(self.candidates, self.counts) if votes >= 0}
+
+def safely_defeated(vote_counts):
+    # The largest group of trailing candidates whose combined votes are fewer
+    # than those of the next candidate up: no transfer among them can lift
+    # any of them past that candidate, so they can all be defeated together.
+    ordered = sorted(vote_counts.items(), key=lambda item: item[1])
+    running = 0
+    safe = 0
+    for i in range(len(ordered) - 1):
+        running += ordered[i][1]
+        if running < ordered[i + 1][1]:
+            safe = i + 1
+    return sorted((candidate for candidate, _ in ordered[:safe]), key=lambda c: c.id)
+
+# Tie-break rules take the election and the tied candidates and return the
+# ones that are still tied for elimination. They only read the round history
+# and maintained tallies, never the ballots.
+def previous_rounds(election, tied):
+    # Look back for the latest earlier round that separates the tied candidates
+    for round in reversed(election.rounds[:-1]):
+        fewest = min(round.counts[c.id] for c in tied)
+        losers = [c for c in tied if round.counts[c.id] == fewest]
+        if len(losers) < len(tied):
+            return losers
+    return tied
+
+def first_choices(election, tied):
+    fewest = min(election.first_choice_counts[c.id] for c in tied)
+    return [c for c in tied if election.first_choice_counts[c.id] == fewest]
+
+# Rules and tie-breaks are module-level functions, partials and instances
+# rather than closures, so elections carrying them can be pickled into
+# worker processes under any start method
+def _drawn_by_lot(seed, election, tied):
+    import random
+    rng = random.Random(f"{seed}:{len(election.rounds)}")
+    return [rng.choice(sorted(tied, key=lambda c: c.id))]
+
+def drawn_by_lot(seed):
+    return functools.partial(_drawn_by_lot, seed)
+
+class _TieBreak:
+    def __init__(self, rules):
+        self.rules = rules
+
+    def __call__(self, election, tied):
+        for rule in self.rules:
+            if len(tied) == 1:
+                break
+            tied = rule(election, tied)
+        return max(tied, key=lambda c: c.id)
+
+def make_tie_break(*rules):
+    # Applies the rules in order; if candidates are still tied afterwards, the
+    # one registered last is eliminated so the outcome is always deterministic
+    return _TieBreak(rules)
 
 class Election:
+    # Bulk loaders turn this off so truncated rankings don't flood stdout
+    warn_incomplete_ballots = True
+    # Per-round instrumentation, see RoundStats
+    collect_stats = False
+    trace_memory = False
+    # Whether the tabulation backend keeps the ballot movement counters
+    tracks_ballot_movement = True
+    # Defeat every candidate in safely_defeated at once instead of one round each
+    bulk_elimination = False
+    # tie_break(election, tied) picks the one candidate to eliminate when several
+    # tie for the fewest votes; by default all of them are eliminated
+    tie_break = None
+
     def __init__(self, candidates):
         self.candidates = {candidate.name: candidate for candidate in candidates}
+        self.by_id = list(self.candidates.values())
+        for i, candidate in enumerate(self.by_id):
+            candidate.id = i
+        self._ids = {name: candidate.id for name, candidate in self.candidates.items()}
         self.ballots = []
         self.rounds = []
+        # Identical rankings share one Ballot pile, keyed by the bytes of the
+        # candidate ID array
+        self._piles = {}
+        # First-choice totals and piles by candidate ID, maintained as ballots arrive
+        self.first_choice_counts = array('q', [0]) * len(self.by_id)
+        self._first_choices = [[] for _ in self.by_id]
+        # Tabulation state: ballots grouped by the continuing candidate they
+        # currently count for, and the vote total of each bucket
+        self._buckets = None
+        self._totals = None
+        # Running totals for instrumentation, never reset
+        self._exhausted = 0
+        self._touched = 0
+        self._piles_touched = 0
+        self.observers = []
+        # Head-to-head matrix, kept up to date by add_ballot once enabled
+        self.pairwise = None
+        # Transfers out of each candidate eliminated in the current round
+        self._transfers = None
+
+    def enable_pairwise(self):
+        if self.pairwise is None:
+            from ranked_choice_voting_pairwise import PairwiseMatrix
+            self.pairwise = PairwiseMatrix.from_election(self)
+        return self.pairwise
 
     def validate_ballot(self, rankings):
         if not rankings:
@@ -53,86 +248,290 @@ class Election:
             if candidate not in self.candidates:
                 raise InvalidBallotException(f"Invalid candidate: {candidate}")
 
-        if len(rankings) < len(self.candidates):
+        if self.warn_incomplete_ballots and len(rankings) < len(self.candidates):
             print(f"Warning: Ballot has fewer candidates than registered ({len(rankings)} < {len(self.candidates)})")
 
-    def add_ballot(self, rankings):
-        ballot = Ballot([self.candidates[name] for name in rankings])
-        self.ballots.append(ballot)
+    def _classify_ballot(self, rankings):
+        if not rankings:
+            return "empty"
+        if len(rankings) != len(set(rankings)):
+            return "duplicate"
+        candidates = self.candidates
+        for name in rankings:
+            if name not in candidates:
+                return "invalid_candidate"
+        if len(rankings) < len(candidates):
+            return "incomplete"
+        return None
+
+    def validate_ballots(self, ballots):
+        # Each distinct ranking is classified once, so the cost follows the
+        # number of distinct rankings rather than the number of ballots.
+        report = ValidationReport()
+        kinds = {}
+        for i, rankings in enumerate(ballots):
+            key = tuple(rankings)
+            if key in kinds:
+                kind = kinds[key]
+            else:
+                kind = kinds[key] = self._classify_ballot(key)
+            if kind:
+                report.indices[kind].append(i)
+            report.total += 1
+        return report
 
-    def count_votes(self):
-        counts = {candidate: 0 for candidate in self.candidates.values() if not candidate.eliminated}
+    def add_ballot(self, rankings, count=1):
+        if isinstance(count, bool) or not isinstance(count, int) or count < 1:
+            raise InvalidBallotException(f"Ballot count must be a positive integer, got {count!r}")
+        try:
+            ids = array('H', [self._ids[name] for name in rankings])
+        except KeyError:
+            self.validate_ballot(rankings)
+            raise
+        if self._pile_key(ids) not in self._piles:
+            self.validate_ballot(rankings)
+        self._add_pile(ids, count)
+
+    def add_ballots(self, ballots):
+        # Validates the whole batch, then adds each distinct valid ranking once.
+        # Invalid ballots are skipped and reported rather than raised.
+        ballots = list(ballots)
+        report = self.validate_ballots(ballots)
+        invalid = set(report.invalid_indices())
+        batch = Counter(tuple(rankings) for i, rankings in enumerate(ballots) if i not in invalid)
+        for rankings, count in batch.items():
+            self._add_pile(array('H', [self._ids[name] for name in rankings]), count)
+        return report
+
+    # Subclasses that keep extra per-pile data override these two hooks
+    def _pile_key(self, ids):
+        return ids.tobytes()
+
+    def _new_ballot(self, ids, count):
+        return Ballot(ids, count)
+
+    def _add_pile(self, ids, count):
+        key = self._pile_key(ids)
+        ballot = self._piles.get(key)
+        if ballot is None:
+            ballot = self._new_ballot(ids, count)
+            self._piles[key] = ballot
+            self.ballots.append(ballot)
+            self._first_choices[ids[0]].append(ballot)
+        else:
+            if not ballot.count:
+                # A pile emptied by set_pile_counts rejoins the count
+                self.ballots.append(ballot)
+                self._first_choices[ids[0]].append(ballot)
+            ballot.count += count
+        self.first_choice_counts[ids[0]] += count
+        if self.pairwise is not None:
+            self.pairwise.add(ids, count)
+
+    def set_pile_counts(self, counts):
+        # Replaces the count of every pile, in the order the piles were first
+        # added, e.g. to re-tabulate a resample of the same rankings. Piles
+        # set to zero are left out of the count until ballots are added again.
+        self.ballots = []
+        self._first_choices = [[] for _ in self.by_id]
+        self.first_choice_counts = array('q', [0]) * len(self.by_id)
+        for ballot, count in zip(self._piles.values(), counts):
+            ballot.count = count
+            if count:
+                self.ballots.append(ballot)
+                self._first_choices[ballot.rankings[0]].append(ballot)
+                self.first_choice_counts[ballot.rankings[0]] += count
+        if self.pairwise is not None:
+            self.pairwise = None
+            self.enable_pairwise()
+
+    def ballot_count(self):
+        return sum(self.first_choice_counts)
+
+    def start_count(self):
+        self.rounds = []
+        # Every pile starts on its first choice, which add_ballot already
+        # tracks, so a recount only has to rewind the pointers
+        self._buckets = [list(piles) for piles in self._first_choices]
+        self._totals = array('q', self.first_choice_counts)
+        for candidate in self.by_id:
+            candidate.eliminated = False
         for ballot in self.ballots:
-            choice = ballot.get_next_choice()
-            if choice:
-                counts[choice] += 1
-        return counts
+            ballot.current_rank = 1
+        self._touched += self.ballot_count()
+        self._piles_touched += len(self.ballots)
+
+    def elimination_order(self):
+        return [round.eliminated_candidate for round in self.rounds if round.eliminated_candidate]
+
+    def republish(self):
+        # Re-runs the count over the current piles for live results and reports
+        # whether the ballots added since the last run changed the elimination order
+        previous = self.elimination_order() if self.rounds else None
+        winner = self.run_election()
+        return winner, previous is not None and self.elimination_order() != previous
+
+    def _assign_ballot(self, ballot):
+        self._touched += ballot.count
+        self._piles_touched += 1
+        choice = ballot.get_next_choice(self.by_id)
+        if choice:
+            self._buckets[choice.id].append(ballot)
+            self._totals[choice.id] += ballot.count
+        else:
+            self._exhausted += ballot.count
+        return choice
+
+    def count_votes(self):
+        if self._totals is None:
+            self.start_count()
+        totals = self._totals
+        return {candidate: totals[candidate.id] for candidate in self.by_id if not candidate.eliminated}
 
     def count_next_choice_votes(self, candidates_to_check):
+        # The first continuing candidate to check after each ballot's first
+        # choice. Exhausted ballots have none, and everything a counting ballot
+        # skipped before its current choice is eliminated, so only the buckets
+        # are walked and most ballots stop at their current choice.
+        if self._totals is None:
+            self.start_count()
+        allowed = bytearray(len(self.by_id))
+        for candidate in candidates_to_check:
+            if not candidate.eliminated:
+                allowed[candidate.id] = 1
         next_choice_counts = defaultdict(int)
-        for ballot in self.ballots:
-            for choice in ballot.rankings[1:]:  # Start from the second choice
-                if choice in candidates_to_check and not choice.eliminated:
-                    next_choice_counts[choice] += 1
-                    break
+        candidates = self.by_id
+        for bucket in self._buckets:
+            for ballot in bucket:
+                rankings = ballot.rankings
+                for rank in range(max(ballot.current_rank - 1, 1), len(rankings)):
+                    if allowed[rankings[rank]]:
+                        next_choice_counts[candidates[rankings[rank]]] += ballot.count
+                        break
         return next_choice_counts
 
     def eliminate_candidate(self, candidate):
         candidate.eliminated = True
-        # Reset all ballots to allow recounting
-        for ballot in self.ballots:
-            ballot.current_rank = 0
+        if self._totals is None:
+            return
+        # Only the eliminated candidate's ballots move on to their next choice
+        moved, self._buckets[candidate.id] = self._buckets[candidate.id], []
+        self._totals[candidate.id] = 0
+        transfers = array('q', [0]) * (len(self.by_id) + 1)
+        for ballot in moved:
+            choice = self._assign_ballot(ballot)
+            transfers[choice.id if choice else -1] += ballot.count
+        if self._transfers is not None:
+            self._transfers[candidate.id] = transfers
+
+    def _candidates_to_eliminate(self, vote_counts):
+        min_votes = min(vote_counts.values())
+        lowest = [c for c, v in vote_counts.items() if v == min_votes]
+        if self.bulk_elimination:
+            defeated = safely_defeated(vote_counts)
+            if len(defeated) >= len(lowest):
+                return defeated
+        if len(lowest) > 1 and self.tie_break is not None:
+            return [self.tie_break(self, lowest)]
+        return lowest
 
     def is_tie(self, vote_counts):
         return len(set(vote_counts.values())) == 1 and len(vote_counts) > 1
 
+    def add_observer(self, observer):
+        # observer(election, round) is called as each round completes
+        self.observers.append(observer)
+
+    def _round_stats(self):
+        if self.collect_stats or self.trace_memory:
+            return RoundStats(self)
+        return None
+
     def run_election(self):
-        while True:
-            vote_counts = self.count_votes()
-            
-            if not vote_counts:
-                self.rounds.append(Round({}, is_tie=True))
-                return "No winner"
-
-            total_votes = sum(vote_counts.values())
-            
-            self.rounds.append(Round(vote_counts.copy()))
-            
-            # Check for a winner
-            for candidate, votes in vote_counts.items():
-                if votes > total_votes / 2:
-                    return candidate.name
-
-            # Check for a tie
-            if self.is_tie(vote_counts):
-                tied_candidates = list(vote_counts.keys())
-                next_choice_counts = self.count_next_choice_votes(self.candidates.values())
-                
-                if next_choice_counts:
-                    max_next_choices = max(next_choice_counts.values())
-                    winners = [c for c, v in next_choice_counts.items() if v == max_next_choices]
-                    
-                    if len(winners) == 1:
-                        self.rounds[-1].is_tie = True
-                        self.rounds[-1].tie_broken = True
-                        return winners[0].name
-
-                self.rounds[-1].is_tie = True
-                return "No winner"
-
-            # Eliminate the candidate(s) with the least votes
-            min_votes = min(vote_counts.values())
-            candidates_to_eliminate = [c for c, v in vote_counts.items() if v == min_votes]
-            
-            for candidate in candidates_to_eliminate:
-                self.eliminate_candidate(candidate)
-            self.rounds[-1].eliminated_candidate = ", ".join([c.name for c in candidates_to_eliminate])
-            
-            remaining_candidates = [c for c in self.candidates.values() if not c.eliminated]
-            if len(remaining_candidates) == 1:
-                return remaining_candidates[0].name
-            elif len(remaining_candidates) == 0:
-                return "No winner"
+        # tracemalloc is slow to import, so it is only loaded when asked for
+        tracing = False
+        if self.trace_memory:
+            import tracemalloc
+            tracing = not tracemalloc.is_tracing()
+            if tracing:
+                tracemalloc.start()
+        try:
+            # The first round's stats include distributing the first choices
+            stats = self._round_stats()
+            self.start_count()
+            while True:
+                winner = self._run_round(stats)
+                if stats:
+                    stats.finish(self)
+                    self.rounds[-1].stats = stats
+                for observer in self.observers:
+                    observer(self, self.rounds[-1])
+                if winner is not None:
+                    return winner
+                stats = self._round_stats()
+        finally:
+            if tracing:
+                tracemalloc.stop()
+
+    def _run_round(self, stats):
+        vote_counts = self.count_votes()
+        if stats:
+            stats.lap("count")
+
+        if not vote_counts:
+            self.rounds.append(Round.from_vote_counts({}, self.by_id, is_tie=True))
+            return "No winner"
+
+        total_votes = sum(vote_counts.values())
+
+        self.rounds.append(Round.from_vote_counts(vote_counts, self.by_id))
+
+        # Check for a winner
+        for candidate, votes in vote_counts.items():
+            if votes > total_votes / 2:
+                return candidate.name
+
+        # Check for a tie
+        if self.is_tie(vote_counts):
+            next_choice_counts = self.count_next_choice_votes(self.candidates.values())
+            if stats:
+                stats.lap("tie_break")
+
+            if next_choice_counts:
+                max_next_choices = max(next_choice_counts.values())
+                winners = [c for c, v in next_choice_counts.items() if v == max_next_choices]
+
+                if len(winners) == 1:
+                    self.rounds[-1].is_tie = True
+                    self.rounds[-1].tie_broken = True
+                    return winners[0].name
+
+            self.rounds[-1].is_tie = True
+            return "No winner"
+
+        # Eliminate the candidate(s) with the least votes
+        candidates_to_eliminate = self._candidates_to_eliminate(vote_counts)
+
+        # All of them are out before any ballots move, so a ballot passes
+        # straight to its next continuing choice and each transfer is
+        # credited to the candidate it actually left
+        for candidate in candidates_to_eliminate:
+            candidate.eliminated = True
+        self._transfers = {}
+        for candidate in candidates_to_eliminate:
+            self.eliminate_candidate(candidate)
+        self.rounds[-1].transfers = self._transfers or None
+        self._transfers = None
+        self.rounds[-1].eliminated_candidate = ", ".join([c.name for c in candidates_to_eliminate])
+        if stats:
+            stats.lap("eliminate")
+
+        remaining_candidates = [c for c in self.candidates.values() if not c.eliminated]
+        if len(remaining_candidates) == 1:
+            return remaining_candidates[0].name
+        elif len(remaining_candidates) == 0:
+            return "No winner"
+        return None
 
     def print_results(self):
         for i, round in enumerate(self.rounds, 1):
@@ -147,6 +546,9 @@ class Election:
                     print("  No more choices available. Election ended in a tie.")
             elif round.eliminated_candidate:
                 print(f"  Eliminated: {round.eliminated_candidate}")
+            if round.elected_candidate:
+                print(f"  Elected: {round.elected_candidate}")
             print()
 
-__all__ = ['Candidate', 'Ballot', 'Round', 'Election', 'InvalidBallotException']
+__all__ = ['Candidate', 'Ballot', 'Round', 'Election', 'InvalidBallotException', 'RoundStats', 'ValidationReport',
+           'drawn_by_lot', 'first_choices', 'make_tie_break', 'previous_rounds', 'safely_defeated']
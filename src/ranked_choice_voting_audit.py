@@ -0,0 +1,233 @@
+import math
+import multiprocessing
+import os
+import random
+import statistics
+from array import array
+from collections import Counter
+from ranked_choice_voting import Candidate, Election
+
+def _numpy():
+    # NumPy is optional; when it is installed a sample is one multinomial call
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+def _binomial(rng, n, p):
+    # Exact binomial draw in constant expected time. Small means step between
+    # successes with geometric waiting times; larger ones use Hormann's BTRS
+    # transformed rejection, the method behind random.binomialvariate in
+    # Python 3.12. Kept here so samples are the same on every Python version.
+    if p <= 0 or n == 0:
+        return 0
+    if p >= 1:
+        return n
+    if p > 0.5:
+        return n - _binomial(rng, n, 1 - p)
+    if n * p < 10:
+        log_q = math.log1p(-p)
+        successes = 0
+        trial = 0
+        while True:
+            trial += int(math.log(1.0 - rng.random()) / log_q) + 1
+            if trial > n:
+                return successes
+            successes += 1
+
+    spq = math.sqrt(n * p * (1 - p))
+    b = 1.15 + 2.53 * spq
+    a = -0.0873 + 0.0248 * b + 0.01 * p
+    c = n * p + 0.5
+    vr = 0.92 - 4.2 / b
+    alpha = (2.83 + 5.1 / b) * spq
+    lpq = math.log(p / (1 - p))
+    mode = math.floor((n + 1) * p)
+    h = math.lgamma(mode + 1) + math.lgamma(n - mode + 1)
+    while True:
+        u = rng.random() - 0.5
+        us = 0.5 - abs(u)
+        k = math.floor((2 * a / us + b) * u + c)
+        if k < 0 or k > n:
+            continue
+        v = rng.random()
+        # Most draws are accepted by this squeeze without any logarithms
+        if us >= 0.07 and v <= vr:
+            return k
+        v *= alpha / (a / (us * us) + b)
+        if math.log(v) <= h - math.lgamma(k + 1) - math.lgamma(n - k + 1) + (k - mode) * lpq:
+            return k
+
+class BallotStore:
+    # Preprocessed, read-only view of an election for repeated re-tabulation:
+    # the distinct rankings once, and a sample is just a count vector over
+    # them. A single scratch Election is reused for every sample through
+    # set_pile_counts, so no Ballot objects are created per sample and the
+    # round and tie semantics are run_election's own. The election's
+    # tie-break and bulk elimination rules are carried over.
+    def __init__(self, names, rankings, counts, tie_break=None, bulk_elimination=False):
+        self.names = list(names)
+        self.rankings = list(rankings)
+        self.counts = array('q', counts)
+        self.total = sum(self.counts)
+        self.tie_break = tie_break
+        self.bulk_elimination = bulk_elimination
+        self._shares = None
+        self._election = None
+
+    @classmethod
+    def from_election(cls, election):
+        return cls([candidate.name for candidate in election.by_id],
+                   [ballot.rankings for ballot in election.ballots],
+                   [ballot.count for ballot in election.ballots],
+                   election.tie_break, election.bulk_elimination)
+
+    def __getstate__(self):
+        return {"names": self.names, "rankings": self.rankings, "counts": self.counts,
+                "tie_break": self.tie_break, "bulk_elimination": self.bulk_elimination}
+
+    def __setstate__(self, state):
+        self.__init__(state["names"], state["rankings"], state["counts"],
+                      state["tie_break"], state["bulk_elimination"])
+
+    def resample(self, rng, size=None):
+        # Multinomial draw of size ballots (default: as many as were cast),
+        # with replacement, returned as counts per distinct ranking. The cost
+        # follows the number of piles, not the number of ballots: NumPy draws
+        # the whole vector at once, otherwise each pile takes a binomial share
+        # of the ballots the piles before it left over, drawn in constant
+        # expected time.
+        size = self.total if size is None else size
+        numpy = _numpy()
+        if numpy is not None and self.total:
+            if self._shares is None:
+                self._shares = numpy.array(self.counts, dtype=float) / self.total
+            drawn = numpy.random.default_rng(rng.getrandbits(64)).multinomial(size, self._shares)
+            return array('q', drawn.tolist())
+        counts = array('q', [0]) * len(self.rankings)
+        left = self.total
+        for pile, weight in enumerate(self.counts):
+            if not size:
+                break
+            drawn = size if weight >= left else _binomial(rng, size, weight / left)
+            counts[pile] = drawn
+            size -= drawn
+            left -= weight
+        return counts
+
+    def _scratch(self):
+        if self._election is None:
+            election = Election([Candidate(name) for name in self.names])
+            election.warn_incomplete_ballots = False
+            election.tie_break = self.tie_break
+            election.bulk_elimination = self.bulk_elimination
+            for ranking in self.rankings:
+                election._add_pile(ranking, 1)
+            self._election = election
+        return self._election
+
+    def tabulate(self, counts):
+        # Returns (winner, elimination order, final margin, closest elimination
+        # margin) for the given count vector. Empty piles are left out entirely
+        # so they can't show up in a next-choice tie-break.
+        election = self._scratch()
+        election.set_pile_counts(counts)
+        winner = election.run_election()
+        return winner, election.elimination_order(), *_margins(election.rounds)
+
+def _margins(rounds):
+    # Lead of the top candidate over the runner-up in the last contested
+    # round, and the smallest gap between the last-placed candidate and the
+    # one above it over all rounds with an elimination
+    final = None
+    closest = None
+    for round in rounds:
+        votes = sorted((v for v in round.counts if v >= 0), reverse=True)
+        if len(votes) < 2:
+            continue
+        final = votes[0] - votes[1]
+        if round.eliminated_candidate and len(votes) > 2:
+            gap = votes[-2] - votes[-1]
+            closest = gap if closest is None else min(closest, gap)
+    return final, closest
+
+def _sample_rng(seed, sample):
+    # Per-sample streams, so results don't depend on how samples are split
+    # across processes
+    return random.Random(f"{seed}:{sample}")
+
+_worker_store = None
+
+def _init_worker(store):
+    global _worker_store
+    _worker_store = store
+
+def _run_samples(args):
+    seed, samples, size = args
+    return [_worker_store.tabulate(_worker_store.resample(_sample_rng(seed, i), size))
+            for i in samples]
+
+class AuditReport:
+    def __init__(self, reported_winner, results, ballots_per_sample):
+        self.reported_winner = reported_winner
+        self.ballots_per_sample = ballots_per_sample
+        self.samples = len(results)
+        self.winners = Counter(winner for winner, _, _, _ in results)
+        self.elimination_orders = Counter(tuple(order) for _, order, _, _ in results)
+        self.margins = [margin for _, _, margin, _ in results if margin is not None]
+        self.elimination_margins = [gap for _, _, _, gap in results if gap is not None]
+
+    def stability(self):
+        # Share of samples that reproduce the reported winner
+        return self.winners[self.reported_winner] / self.samples if self.samples else 0.0
+
+    def margin_summary(self, margins=None):
+        margins = sorted(self.margins if margins is None else margins)
+        if not margins:
+            return None
+        return {
+            "mean": statistics.fmean(margins),
+            "stdev": statistics.pstdev(margins),
+            "min": margins[0],
+            "p05": margins[int(0.05 * (len(margins) - 1))],
+            "median": statistics.median(margins),
+        }
+
+    def to_dict(self):
+        return {
+            "reported_winner": self.reported_winner,
+            "samples": self.samples,
+            "ballots_per_sample": self.ballots_per_sample,
+            "stability": self.stability(),
+            "winners": dict(self.winners),
+            "elimination_orders": [[list(order), count] for order, count in self.elimination_orders.most_common()],
+            "final_margin": self.margin_summary(),
+            "elimination_margin": self.margin_summary(self.elimination_margins),
+        }
+
+def run_audit(election, samples=1000, sample_size=None, seed=0, processes=None, chunk_size=50):
+    # Bootstrap audit: re-tabulates samples resamples of the cast ballots (or
+    # sample_size ballots each, for a ballot-polling style sample) and reports
+    # how often the reported winner holds up. The reported winner and every
+    # sample are counted under the election's own tie-break and elimination
+    # rules. Samples are spread over a process pool; processes=1 runs them in
+    # this process.
+    store = BallotStore.from_election(election)
+    reported = store.tabulate(store.counts)[0]
+    chunks = [(seed, range(start, min(start + chunk_size, samples)), sample_size)
+              for start in range(0, samples, chunk_size)]
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or len(chunks) == 1:
+        _init_worker(store)
+        try:
+            results = [result for chunk in chunks for result in _run_samples(chunk)]
+        finally:
+            _init_worker(None)
+    else:
+        with multiprocessing.get_context().Pool(min(processes, len(chunks)), initializer=_init_worker,
+                                                initargs=(store,)) as pool:
+            results = [result for chunk in pool.map(_run_samples, chunks) for result in chunk]
+    return AuditReport(reported, results, store.total if sample_size is None else sample_size)
+
+__all__ = ['AuditReport', 'BallotStore', 'run_audit']
@@ -0,0 +1,162 @@
+import mmap
+import struct
+import sys
+from array import array
+from itertools import islice
+from ranked_choice_voting import Candidate, Election
+
+BINARY_EXTENSION = ".rcvb"
+MAGIC = b"RCVB"
+VERSION = 1
+# magic, version, candidate count, pile count, total ranking entries
+HEADER = struct.Struct("<4sHHQQ")
+
+class InvalidElectionFile(ValueError):
+    pass
+
+# Layout after the header: the candidate table (u16 length + UTF-8 name each),
+# zero padding to an 8-byte boundary, then three little-endian arrays:
+# u64 ranking offsets (pile count + 1), u32 pile counts and u16 candidate IDs.
+def _padding(size):
+    return -size % 8
+
+def _little_endian(values):
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values
+
+def save_election_binary(election, filename):
+    candidates = election.by_id
+    offsets = array("Q", [0])
+    counts = array("I")
+    rankings = array("H")
+    for ballot in election.ballots:
+        rankings.extend(ballot.rankings)
+        offsets.append(len(rankings))
+        counts.append(ballot.count)
+
+    table = bytearray()
+    for candidate in candidates:
+        name = candidate.name.encode("utf-8")
+        table += struct.pack("<H", len(name)) + name
+    table += bytes(_padding(HEADER.size + len(table)))
+
+    with open(filename, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(candidates), len(counts), len(rankings)))
+        f.write(table)
+        for values in (offsets, counts, rankings):
+            f.write(_little_endian(values).tobytes())
+
+class BinaryElectionFile:
+    # Read-only view of a binary election file. The arrays are memoryviews
+    # over the mapped file, so opening costs nothing per ballot.
+    def __init__(self, filename):
+        self._file = open(filename, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise InvalidElectionFile(f"{filename} is empty")
+        try:
+            self._parse(filename)
+        except Exception:
+            self.close()
+            raise
+
+    def _parse(self, filename):
+        if len(self._map) < HEADER.size:
+            raise InvalidElectionFile(f"{filename} is not a binary election file")
+        magic, version, n_candidates, n_piles, n_entries = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise InvalidElectionFile(f"{filename} is not a binary election file")
+        if version != VERSION:
+            raise InvalidElectionFile(f"Unsupported binary election file version {version}")
+
+        pos = HEADER.size
+        self.candidates = []
+        for _ in range(n_candidates):
+            if pos + 2 > len(self._map):
+                raise InvalidElectionFile(f"{filename} has a truncated candidate table")
+            (length,) = struct.unpack_from("<H", self._map, pos)
+            pos += 2
+            if pos + length > len(self._map):
+                raise InvalidElectionFile(f"{filename} has a truncated candidate table")
+            self.candidates.append(bytes(self._map[pos:pos + length]).decode("utf-8"))
+            pos += length
+        pos += _padding(pos)
+
+        view = self._view = memoryview(self._map)
+        arrays = []
+        for typecode, length in (("Q", n_piles + 1), ("I", n_piles), ("H", n_entries)):
+            size = length * array(typecode).itemsize
+            if pos + size > len(self._map):
+                raise InvalidElectionFile(f"{filename} is truncated")
+            if sys.byteorder == "little":
+                arrays.append(view[pos:pos + size].cast(typecode))
+            else:
+                values = array(typecode, view[pos:pos + size])
+                values.byteswap()
+                arrays.append(values)
+            pos += size
+        self.offsets, self.counts, self.rankings = arrays
+        self._validate(filename, n_candidates, n_entries)
+
+    def _validate(self, filename, n_candidates, n_entries):
+        # Checked up front so a damaged file fails with InvalidElectionFile
+        # rather than an IndexError halfway through loading
+        offsets = self.offsets
+        if offsets[0] != 0 or offsets[-1] != n_entries:
+            raise InvalidElectionFile(f"{filename} has inconsistent ranking offsets")
+        if any(end <= start for start, end in zip(offsets, islice(offsets, 1, None))):
+            raise InvalidElectionFile(f"{filename} has an empty or out-of-order ranking")
+        if n_entries and max(self.rankings) >= n_candidates:
+            raise InvalidElectionFile(f"{filename} refers to a candidate that isn't listed")
+        if len(self.counts) and min(self.counts) < 1:
+            raise InvalidElectionFile(f"{filename} has a pile with no ballots")
+
+    def __len__(self):
+        return len(self.counts)
+
+    def ranking(self, i):
+        return self.rankings[self.offsets[i]:self.offsets[i + 1]]
+
+    def piles(self):
+        names = self.candidates
+        for i in range(len(self)):
+            # Release each slice right away; a view left alive would stop
+            # close() from unmapping the file
+            ranking = self.ranking(i)
+            try:
+                names_in_order = [names[c] for c in ranking]
+            finally:
+                if isinstance(ranking, memoryview):
+                    ranking.release()
+            yield names_in_order, self.counts[i]
+
+    def close(self):
+        for name in ("offsets", "counts", "rankings"):
+            values = getattr(self, name, None)
+            if isinstance(values, memoryview):
+                values.release()
+        if getattr(self, "_view", None) is not None:
+            self._view.release()
+        if getattr(self, "_map", None) is not None:
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def load_election_binary(filename, election_class=Election):
+    with BinaryElectionFile(filename) as data:
+        election = election_class([Candidate(name) for name in data.candidates])
+        election.warn_incomplete_ballots = False
+        for ranking, count in data.piles():
+            election.add_ballot(ranking, count)
+    return election
+
+__all__ = ['BINARY_EXTENSION', 'BinaryElectionFile', 'InvalidElectionFile',
+           'save_election_binary', 'load_election_binary']
@@ -0,0 +1,208 @@
+import hashlib
+import json
+import os
+import tempfile
+from array import array
+from ranked_choice_voting import Election, Round
+from ranked_choice_voting_summary import BallotSummary
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "ranked_choice_voting")
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+CACHE_VERSION = 3
+ENTRY_SUFFIX = ".json"
+ALIAS_SUFFIX = ".file"
+
+def election_key(election):
+    # Canonical content hash: candidates in registration order (it decides
+    # tie-breaks), then every distinct ranking with its count in a fixed order,
+    # so the same ballots hash alike whatever file format or order they came in.
+    digest = hashlib.sha256()
+    digest.update(json.dumps([CACHE_VERSION, type(election).__name__, election.bulk_elimination,
+                              list(election.candidates)]).encode())
+    for ballot in sorted(election.ballots, key=lambda ballot: ballot.rankings.tobytes()):
+        digest.update(len(ballot.rankings).to_bytes(2, "little"))
+        digest.update(ballot.rankings.tobytes())
+        digest.update(ballot.count.to_bytes(8, "little"))
+    return digest.hexdigest()
+
+def file_key(filename, chunk_size=1 << 20):
+    # Digest of the raw file bytes, so an unchanged file can be recognised
+    # without parsing it again
+    digest = hashlib.sha256()
+    with open(filename, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _round_to_dict(round):
+    return {
+        "counts": list(round.counts),
+        "typecode": round.counts.typecode,
+        "eliminated": round.eliminated_candidate,
+        "elected": round.elected_candidate,
+        "is_tie": round.is_tie,
+        "tie_broken": round.tie_broken,
+        "transfers": None if round.transfers is None else
+                     [[source, list(row)] for source, row in round.transfers.items()],
+    }
+
+def _round_from_dict(data, candidates):
+    transfers = data["transfers"]
+    if transfers is not None:
+        transfers = {source: array('q', row) for source, row in transfers}
+    return Round(array(data["typecode"], data["counts"]), candidates,
+                 eliminated_candidate=data["eliminated"], is_tie=data["is_tie"],
+                 tie_broken=data["tie_broken"], elected_candidate=data["elected"],
+                 transfers=transfers)
+
+class ResultsCache:
+    # On-disk cache of finished tabulations. Each entry holds the pile summary,
+    # the rounds and the winner for one canonical election hash; small alias
+    # files map raw file digests to those hashes. Entries are evicted least
+    # recently used first once the directory grows past max_bytes.
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key, suffix=ENTRY_SUFFIX):
+        return os.path.join(self.directory, key + suffix)
+
+    def _read(self, path):
+        try:
+            with open(path) as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        # Touch on every hit so eviction order follows use, not creation
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return data
+
+    def _write(self, path, text):
+        # A unique temporary name, as several batch workers may write the
+        # same entry at once
+        fd, temporary = tempfile.mkstemp(suffix=".tmp", dir=self.directory)
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(text)
+            os.replace(temporary, path)
+        except BaseException:
+            os.remove(temporary)
+            raise
+
+    def get(self, key, election_class=Election):
+        # Returns (election, winner) rebuilt from the cached piles and rounds,
+        # or None
+        text = self._read(self._path(key))
+        if text is None:
+            return None
+        entry = json.loads(text)
+        if entry.get("version") != CACHE_VERSION:
+            return None
+        election = BallotSummary.from_dict(entry["summary"]).to_election(election_class)
+        self.restore(election, entry)
+        return election, entry["winner"]
+
+    def restore(self, election, entry):
+        election.rounds = [_round_from_dict(data, election.by_id) for data in entry["rounds"]]
+        # Round labels join tied and bulk eliminations, so the IDs are stored
+        eliminated = set(entry["eliminated"])
+        for candidate in election.by_id:
+            candidate.eliminated = candidate.id in eliminated
+
+    def put(self, election, winner, key=None):
+        # A custom tie-break rule is arbitrary code, so its results can't be
+        # keyed by content and aren't cached
+        if election.tie_break is not None:
+            return None
+        key = key or election_key(election)
+        entry = {
+            "version": CACHE_VERSION,
+            "winner": winner,
+            "rounds": [_round_to_dict(round) for round in election.rounds],
+            "eliminated": [candidate.id for candidate in election.by_id if candidate.eliminated],
+            "summary": BallotSummary.from_election(election).to_dict(),
+        }
+        self._write(self._path(key), json.dumps(entry, separators=(",", ":")))
+        self.evict()
+        return key
+
+    def tabulate(self, election):
+        # Drop-in for election.run_election() that reuses a cached count of
+        # identical ballots. Observers still see every round on a hit.
+        key = election_key(election)
+        text = self._read(self._path(key))
+        if text is not None:
+            entry = json.loads(text)
+            if entry.get("version") == CACHE_VERSION and election.tie_break is None:
+                self.hits += 1
+                self.restore(election, entry)
+                for round in election.rounds:
+                    for observer in election.observers:
+                        observer(election, round)
+                return entry["winner"]
+        self.misses += 1
+        winner = election.run_election()
+        self.put(election, winner, key)
+        return winner
+
+    def open(self, filename, load, election_class=Election):
+        # Loads filename through load(filename), or rebuilds it from the cached
+        # piles without parsing when the file's bytes were seen before. Follow
+        # with tabulate() to get the count.
+        digest = file_key(filename)
+        key = self._read(self._path(digest, ALIAS_SUFFIX))
+        if key is not None:
+            cached = self.get(key, election_class)
+            if cached is not None:
+                return cached[0]
+        election = load(filename)
+        self._write(self._path(digest, ALIAS_SUFFIX), election_key(election))
+        return election
+
+    def size(self):
+        return sum(self._size(path) for path in self._entries())
+
+    def _entries(self):
+        return [os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                if name.endswith(ENTRY_SUFFIX) or name.endswith(ALIAS_SUFFIX)]
+
+    # Other processes sharing the directory may remove entries at any point,
+    # so a vanished file counts as already evicted
+    def _size(self, path):
+        try:
+            return os.path.getsize(path)
+        except FileNotFoundError:
+            return 0
+
+    def _mtime(self, path):
+        try:
+            return os.path.getmtime(path)
+        except FileNotFoundError:
+            return 0
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def evict(self):
+        entries = sorted(self._entries(), key=self._mtime)
+        sizes = {path: self._size(path) for path in entries}
+        total = sum(sizes.values())
+        while entries and total > self.max_bytes:
+            path = entries.pop(0)
+            total -= sizes[path]
+            self._remove(path)
+
+    def clear(self):
+        for path in self._entries():
+            self._remove(path)
+
+__all__ = ['ResultsCache', 'election_key', 'file_key', 'DEFAULT_CACHE_DIR', 'DEFAULT_MAX_BYTES']
@@ -1,7 +1,15 @@
+import os
 import sys
 import json
+import time
 from ranked_choice_voting import Candidate, Election, InvalidBallotException
 
+# File formats, the results cache and the columnar history are imported where
+# they are used, so a headless batch run only pays for what it touches
+def _is_binary(filename):
+    from ranked_choice_voting_binary import BINARY_EXTENSION
+    return filename.lower().endswith(BINARY_EXTENSION)
+
 def get_candidates():
     candidates = []
     print("Enter candidate names (enter an empty line when finished):")
@@ -27,48 +35,81 @@ def get_ballots(candidates):
     return ballots
 
 def save_election(election, filename):
+    if _is_binary(filename):
+        from ranked_choice_voting_binary import save_election_binary
+        save_election_binary(election, filename)
+        print(f"Election data saved to {filename}")
+        return
     data = {
         "candidates": [c.name for c in election.candidates.values()],
-        "ballots": [[c.name for c in ballot.rankings] for ballot in election.ballots]
+        "ballots": [ballot.names(election.by_id)
+                    for ballot in election.ballots for _ in range(ballot.count)]
     }
     with open(filename, 'w') as f:
         json.dump(data, f, indent=2)
     print(f"Election data saved to {filename}")
 
-def load_election(filename):
-    with open(filename, 'r') as f:
-        data = json.load(f)
-    
-    candidates = [Candidate(name) for name in data["candidates"]]
-    election = Election(candidates)
-    
-    for ballot in data["ballots"]:
-        try:
-            election.add_ballot(ballot)
-        except InvalidBallotException as e:
-            print(f"Warning: Invalid ballot in saved data: {e}")
-    
-    return election
+def load_election(filename, election_class=Election):
+    if _is_binary(filename):
+        from ranked_choice_voting_binary import load_election_binary
+        return load_election_binary(filename, election_class)
+    from ranked_choice_voting_stream import stream_election
 
-def visualize_results(election):
-    max_name_length = max(len(candidate.name) for candidate in election.candidates.values())
-    max_votes = max(max(votes for votes in round.vote_counts.values()) for round in election.rounds) if election.rounds else 0
-    
-    for i, round in enumerate(election.rounds, 1):
-        print(f"\nRound {i}:")
-        for candidate, votes in round.vote_counts.items():
+    def warn_invalid(e):
+        print(f"Warning: Invalid ballot in saved data: {e}")
+
+    def report_progress(ballots_read):
+        print(f"  {ballots_read} ballots read...")
+
+    return stream_election(filename, election_class, on_invalid=warn_invalid, progress=report_progress)
+
+def visualize_results(election, rounds=None):
+    # rounds limits the output to a range of round indices; only those rounds
+    # are materialized from the election's cached columnar history
+    from ranked_choice_voting_history import RoundHistory
+    history = RoundHistory.of(election)
+    max_name_length = max(len(name) for name in history.names)
+    max_votes = history.max_votes
+
+    for i in rounds if rounds is not None else range(len(history)):
+        eliminated, elected, is_tie, tie_broken = history.outcomes[i]
+        print(f"\nRound {i + 1}:")
+        for name, votes in history.vote_counts(i).items():
             bar_length = int((votes / max_votes) * 40) if max_votes > 0 else 0
-            print(f"{candidate.name.ljust(max_name_length)} | {votes:4d} {'█' * bar_length}")
-        
-        if round.eliminated_candidate:
-            print(f"Eliminated: {round.eliminated_candidate}")
-        if round.is_tie:
+            print(f"{name.ljust(max_name_length)} | {votes:4d} {'█' * bar_length}")
+
+        if eliminated:
+            print(f"Eliminated: {eliminated}")
+        if elected:
+            print(f"Elected: {elected}")
+        if is_tie:
             print("This round was a tie.")
-            if round.tie_broken:
+            if tie_broken:
                 print("Tie broken using next choice votes.")
 
+def print_timing_report(election):
+    print("\nTiming report:")
+    for i, round in enumerate(election.rounds, 1):
+        stats = round.stats
+        if stats is None:
+            continue
+        phases = ", ".join(f"{phase} {seconds * 1000:.2f} ms" for phase, seconds in stats.phases.items())
+        line = f"Round {i}: {stats.wall_time * 1000:.2f} ms ({phases})"
+        if stats.ballots_touched is not None:
+            line += (f", {stats.ballots_touched} ballots in {stats.piles_touched} piles touched, "
+                     f"{stats.ballots_exhausted} exhausted")
+        if stats.peak_memory is not None:
+            line += f", {stats.allocated} bytes allocated, peak {stats.peak_memory} bytes"
+        print(line)
+
 def main():
     print("Welcome to the Ranked Choice Voting System!")
+    profile = "--profile" in sys.argv[1:]
+    # Profiling needs a real count, so it bypasses the results cache
+    cache = None
+    if not profile and "--no-cache" not in sys.argv[1:]:
+        from ranked_choice_voting_cache import ResultsCache
+        cache = ResultsCache()
     
     while True:
         print("\nChoose an option:")
@@ -109,18 +150,29 @@ def main():
             except json.JSONDecodeError:
                 print(f"Error: File {filename} is not a valid JSON file.")
                 continue
+            except ValueError as e:
+                print(f"Error: Could not read {filename}: {e}")
+                continue
         
         elif choice == '3':
             filename = input("Enter the filename of the saved election: ").strip()
             try:
-                election = load_election(filename)
-                print(f"Election loaded from {filename}")
-                
+                if cache is not None:
+                    election = cache.open(filename, load_election)
+                    print(f"Election loaded from {filename}")
+                    cache.tabulate(election)
+                else:
+                    election = load_election(filename)
+                    print(f"Election loaded from {filename}")
+
                 if not election.rounds:
                     print("This election hasn't been run yet. Running the election...")
+                    election.collect_stats = election.trace_memory = profile
                     election.run_election()
                 
                 visualize_results(election)
+                if profile:
+                    print_timing_report(election)
                 
             except FileNotFoundError:
                 print(f"Error: File {filename} not found.")
@@ -128,6 +180,9 @@ def main():
             except json.JSONDecodeError:
                 print(f"Error: File {filename} is not a valid JSON file.")
                 continue
+            except ValueError as e:
+                print(f"Error: Could not read {filename}: {e}")
+                continue
         
         elif choice == '4':
             print("Thank you for using the Ranked Choice Voting System. Goodbye!")
@@ -139,10 +194,13 @@ def main():
 
         if choice in ['1', '2']:
             print("\nRunning the election...")
+            election.collect_stats = election.trace_memory = profile
             winner = election.run_election()
             
             print("\nElection Results:")
             election.print_results()
+            if profile:
+                print_timing_report(election)
             print(f"\nThe winner is: {winner}")
 
             save_choice = input("\nDo you want to save this election? (y/n): ").strip().lower()
@@ -150,5 +208,89 @@ def main():
                 filename = input("Enter a filename to save to: ").strip()
                 save_election(election, filename)
 
+def tabulate_file(filename, use_cache=False):
+    # One contest for batch mode, as a JSON-ready dict. Any error is reported
+    # in the result rather than raised, so one bad file doesn't stop the run.
+    start = time.perf_counter()
+    invalid = []
+    parsed = []
+
+    def load(name):
+        parsed.append(name)
+        if _is_binary(name):
+            return load_election(name)
+        from ranked_choice_voting_stream import stream_election
+        return stream_election(name, on_invalid=invalid.append)
+
+    try:
+        if use_cache:
+            from ranked_choice_voting_cache import ResultsCache
+            cache = ResultsCache()
+            election = cache.open(filename, load)
+            winner = cache.tabulate(election)
+        else:
+            election = load(filename)
+            winner = election.run_election()
+    except Exception as e:
+        return {"file": filename, "error": f"{type(e).__name__}: {e}"}
+    elapsed = time.perf_counter() - start
+    return {
+        "file": filename,
+        "winner": winner,
+        "ballots": election.ballot_count(),
+        # Unknown when a cached result meant the file was never parsed
+        "invalid_ballots": len(invalid) if parsed else None,
+        "rounds": [{
+            "votes": {candidate.name: votes for candidate, votes in r.vote_counts.items()},
+            "eliminated": r.eliminated_candidate,
+            "is_tie": r.is_tie,
+            "tie_broken": r.tie_broken,
+        } for r in election.rounds],
+        "seconds": round(elapsed, 6),
+    }
+
+def _tabulate_cached(filename):
+    return tabulate_file(filename, use_cache=True)
+
+def batch_main(argv):
+    # Headless mode for scheduled jobs: tabulates every file and writes one
+    # JSON line per contest, in the order given, to stdout or --output.
+    # Exits non-zero if any contest failed.
+    import argparse
+    parser = argparse.ArgumentParser(prog="ranked_choice_voting_cli.py batch",
+                                     description="Tabulate election files without prompts.")
+    parser.add_argument("files", nargs="+", help="election files (.json, .jsonl, .csv, .rcvb)")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="worker processes (default: one per CPU, 1 to run in-process)")
+    parser.add_argument("--output", help="write JSON Lines here instead of stdout")
+    parser.add_argument("--cache", action="store_true", help="reuse and store results in the results cache")
+    args = parser.parse_args(argv)
+
+    work = _tabulate_cached if args.cache else tabulate_file
+    out = open(args.output, "w") if args.output else sys.stdout
+    failed = 0
+
+    def write(results):
+        nonlocal failed
+        for result in results:
+            failed += "error" in result
+            out.write(json.dumps(result) + "\n")
+
+    try:
+        processes = args.processes or os.cpu_count() or 1
+        if processes == 1 or len(args.files) == 1:
+            write(map(work, args.files))
+        else:
+            import multiprocessing
+            with multiprocessing.get_context().Pool(processes) as pool:
+                # Small contests are cheap, so hand them out several at a time
+                write(pool.imap(work, args.files, chunksize=max(1, len(args.files) // (4 * processes))))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 1 if failed else 0
+
 if __name__ == "__main__":
+    if sys.argv[1:2] == ["batch"]:
+        sys.exit(batch_main(sys.argv[2:]))
     main()
@@ -0,0 +1,219 @@
+import csv
+import json
+import multiprocessing
+import os
+import re
+from array import array
+from collections import Counter
+from ranked_choice_voting import Candidate, Election
+
+RANK_COLUMN = re.compile(r"(?:rank|choice|preference)\s*#?\s*(\d+)", re.IGNORECASE)
+OVERVOTE_MARKS = frozenset(["overvote"])
+UNDERVOTE_MARKS = frozenset(["", "undervote", "skipped"])
+OVERVOTE_RULES = ("exhaust", "skip")
+# Stands in for the marks of a rank the vendor already reported as an
+# overvote, where the names themselves are gone
+_OVERVOTED = frozenset([None, ""])
+
+class ImportReport:
+    # Ballot counts by what the ranking rules did to them. A ballot can fall
+    # into several categories, e.g. a skipped ranking followed by an overvote.
+    KINDS = ("ballots", "counted", "blank", "overvote", "exhausted_by_overvote", "skipped_ranking",
+             "exhausted_by_skips", "duplicate", "unknown_candidate")
+
+    def __init__(self, counts=None):
+        self.counts = Counter(counts or {})
+        self.files = 0
+
+    def merge(self, other):
+        self.counts.update(other.counts)
+        self.files += other.files
+        return self
+
+    def to_dict(self):
+        return {"files": self.files, **{kind: self.counts[kind] for kind in self.KINDS}}
+
+class _Rules:
+    # Turns the marks at each rank into a clean ranking. Overvotes either end
+    # the ballot or are passed over; undervoted ranks are passed over unless
+    # more than max_skipped of them come in a row, which exhausts the ballot.
+    # Repeat rankings of a candidate are ignored.
+    def __init__(self, overvote="exhaust", max_skipped=None, candidates=None):
+        if overvote not in OVERVOTE_RULES:
+            raise ValueError(f"Unknown overvote rule: {overvote}")
+        self.overvote = overvote
+        self.max_skipped = max_skipped
+        self.candidates = None if candidates is None else set(candidates)
+
+    def apply(self, ranks, flags):
+        ranking = []
+        skipped = 0
+        for marks in ranks:
+            if len(marks) > 1:
+                flags.add("overvote")
+                if self.overvote == "exhaust":
+                    if ranking:
+                        flags.add("exhausted_by_overvote")
+                    break
+                skipped += 1
+                continue
+            if self.candidates is not None and marks and next(iter(marks)) not in self.candidates:
+                flags.add("unknown_candidate")
+                marks = ()
+            if not marks:
+                skipped += 1
+                if self.max_skipped is not None and skipped > self.max_skipped:
+                    if ranking:
+                        flags.add("exhausted_by_skips")
+                    break
+                continue
+            (name,) = marks
+            if name in ranking:
+                flags.add("duplicate")
+                continue
+            # Only a blank followed by a later choice counts as a skipped ranking
+            if skipped and ranking:
+                flags.add("skipped_ranking")
+            skipped = 0
+            ranking.append(name)
+        return ranking
+
+class _Piles:
+    # Per-file accumulator: rankings are interned to local candidate IDs and
+    # merged by their bytes, so only distinct rankings travel back from a worker
+    def __init__(self):
+        self.names = []
+        self.ids = {}
+        self.piles = Counter()
+        self.report = ImportReport()
+        self.report.files = 1
+
+    def add(self, ranking, count, flags):
+        ids = self.ids
+        for name in ranking:
+            if name not in ids:
+                ids[name] = len(self.names)
+                self.names.append(name)
+        counts = self.report.counts
+        counts["ballots"] += count
+        for flag in flags:
+            counts[flag] += count
+        if ranking:
+            counts["counted"] += count
+            self.piles[array('H', [ids[name] for name in ranking]).tobytes()] += count
+        elif not flags:
+            counts["blank"] += count
+
+    def result(self):
+        return self.names, dict(self.piles), self.report
+
+def _cell_marks(cell):
+    cell = cell.strip()
+    if cell.lower() in UNDERVOTE_MARKS:
+        return frozenset()
+    if cell.lower() in OVERVOTE_MARKS:
+        return _OVERVOTED
+    return frozenset([cell])
+
+def _rank_columns(header, contest):
+    columns = []
+    for i, title in enumerate(header):
+        match = RANK_COLUMN.search(title)
+        if match and (contest is None or str(contest).lower() in title.lower()):
+            columns.append((int(match.group(1)), i))
+    if not columns:
+        raise ValueError("No rank columns found in CVR header")
+    return [i for _, i in sorted(columns)]
+
+def _import_csv(filename, rules, contest):
+    # Rank-column exports: one row per ballot, one column per rank. Identical
+    # rows are counted first and each distinct row is normalized once.
+    piles = _Piles()
+    with open(filename, "r", newline="") as f:
+        rows = csv.reader(f)
+        header = next(rows, None)
+        if header is None:
+            return piles.result()
+        columns = _rank_columns(header, contest)
+        raw = Counter(tuple(row[i] if i < len(row) else "" for i in columns) for row in rows if row)
+    for cells, count in raw.items():
+        flags = set()
+        ranking = rules.apply([_cell_marks(cell) for cell in cells], flags)
+        piles.add(ranking, count, flags)
+    return piles.result()
+
+def _import_json(filename, rules, contest, candidate_names):
+    # JSON CVR reports: Sessions hold cards, cards hold contests, and each
+    # contest lists its marks with a candidate ID and a rank. Ambiguous marks
+    # and marks that aren't votes are ignored.
+    with open(filename) as f:
+        report = json.load(f)
+    piles = _Piles()
+    raw = Counter()
+    for session in report.get("Sessions", []):
+        record = session.get("Modified") or session.get("Original") or {}
+        for card in record.get("Cards", []):
+            for entry in card.get("Contests", []):
+                if contest is not None and str(entry.get("Id")) != str(contest):
+                    continue
+                marks = {}
+                for mark in entry.get("Marks", []):
+                    if mark.get("IsAmbiguous") or not mark.get("IsVote", True):
+                        continue
+                    name = candidate_names.get(str(mark["CandidateId"]), str(mark["CandidateId"]))
+                    marks.setdefault(mark["Rank"], set()).add(name)
+                top = max(marks, default=0)
+                raw[tuple(frozenset(marks.get(rank, ())) for rank in range(1, top + 1))] += 1
+    for ranks, count in raw.items():
+        flags = set()
+        ranking = rules.apply(ranks, flags)
+        piles.add(ranking, count, flags)
+    return piles.result()
+
+def load_candidate_manifest(filename):
+    # CandidateManifest.json: {"List": [{"Id": ..., "Description": ...}, ...]}
+    with open(filename) as f:
+        manifest = json.load(f)
+    return {str(item["Id"]): item["Description"] for item in manifest["List"]}
+
+def import_cvr_file(args):
+    filename, rules, contest, candidate_names = args
+    if os.path.splitext(filename)[1].lower() == ".json":
+        return _import_json(filename, rules, contest, candidate_names)
+    return _import_csv(filename, rules, contest)
+
+def import_cvr(filenames, candidates=None, contest=None, candidate_names=None, overvote="exhaust",
+               max_skipped=None, election_class=Election, processes=None):
+    # Parses CVR exports one file per worker and streams the distinct rankings
+    # into a single election. Candidates default to every name seen, in order
+    # of first appearance. Returns (election, ImportReport).
+    rules = _Rules(overvote, max_skipped, candidates)
+    tasks = [(filename, rules, contest, candidate_names or {}) for filename in filenames]
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or len(tasks) <= 1:
+        results = [import_cvr_file(task) for task in tasks]
+    else:
+        with multiprocessing.get_context().Pool(min(processes, len(tasks))) as pool:
+            results = pool.map(import_cvr_file, tasks)
+
+    names = list(candidates) if candidates is not None else []
+    known = set(names)
+    for local_names, _, _ in results:
+        for name in local_names:
+            if name not in known:
+                known.add(name)
+                names.append(name)
+    election = election_class([Candidate(name) for name in names])
+    election.warn_incomplete_ballots = False
+    report = ImportReport()
+    for local_names, piles, file_report in results:
+        table = [election._ids[name] for name in local_names]
+        for key, count in piles.items():
+            local = array('H')
+            local.frombytes(key)
+            election._add_pile(array('H', [table[i] for i in local]), count)
+        report.merge(file_report)
+    return election, report
+
+__all__ = ['ImportReport', 'import_cvr', 'import_cvr_file', 'load_candidate_manifest',
+           'OVERVOTE_MARKS', 'UNDERVOTE_MARKS']
@@ -0,0 +1,121 @@
+from array import array
+from ranked_choice_voting import Ballot, Election
+from ranked_choice_voting_history import RoundHistory
+
+class GroupedBallot(Ballot):
+    __slots__ = ('group',)
+
+    # group is the dense ID of the ballot's reporting group
+    def __init__(self, rankings, count=1, group=0):
+        super().__init__(rankings, count)
+        self.group = group
+
+class GroupedElection(Election):
+    # Ballots carry a group tag (a precinct, a ballot style, or a tuple of
+    # several) and piles are kept per group. Eliminations follow the
+    # jurisdiction-wide count as usual, while a groups x candidates table is
+    # kept in step by moving only the piles the core tabulator moves. A copy
+    # of the table is taken at the start of every round, so one run_election
+    # pass yields every group's breakdown.
+    def __init__(self, candidates):
+        super().__init__(candidates)
+        self.groups = []
+        self._group_ids = {}
+        self._group_totals = None
+        # The group label being added to, read by the pile hooks
+        self._group = None
+        # Flattened groups x candidates counts at the start of each round
+        self.group_counts = []
+
+    def group_id(self, group):
+        gid = self._group_ids.get(group)
+        if gid is None:
+            gid = self._group_ids[group] = len(self.groups)
+            self.groups.append(group)
+        return gid
+
+    def add_ballot(self, rankings, count=1, group=None):
+        self._group = group
+        try:
+            super().add_ballot(rankings, count)
+        finally:
+            self._group = None
+
+    def add_ballots(self, ballots, group=None):
+        self._group = group
+        try:
+            return super().add_ballots(ballots)
+        finally:
+            self._group = None
+
+    def _pile_key(self, ids):
+        return self.group_id(self._group).to_bytes(4, "little") + ids.tobytes()
+
+    def _new_ballot(self, ids, count):
+        return GroupedBallot(ids, count, self.group_id(self._group))
+
+    def start_count(self):
+        super().start_count()
+        self.group_counts = []
+        width = len(self.by_id)
+        totals = self._group_totals = array('q', [0]) * (len(self.groups) * width)
+        for ballot in self.ballots:
+            totals[ballot.group * width + ballot.rankings[0]] += ballot.count
+
+    def eliminate_candidate(self, candidate):
+        if self._totals is None:
+            return super().eliminate_candidate(candidate)
+        # The core tabulator swaps the bucket out, so this is the list of
+        # piles that are about to move
+        moved = self._buckets[candidate.id]
+        super().eliminate_candidate(candidate)
+        totals = self._group_totals
+        width = len(self.by_id)
+        by_id = self.by_id
+        for ballot in moved:
+            base = ballot.group * width
+            totals[base + candidate.id] -= ballot.count
+            # A pile that found a continuing choice points just past it
+            choice = ballot.rankings[ballot.current_rank - 1]
+            if not by_id[choice].eliminated:
+                totals[base + choice] += ballot.count
+
+    def _run_round(self, stats):
+        if self._totals is None:
+            self.start_count()
+        self.group_counts.append(array('q', self._group_totals))
+        return super()._run_round(stats)
+
+    def group_row(self, round_index, gid):
+        # Counts for one group in one round, -1 for candidates no longer continuing
+        width = len(self.by_id)
+        row = self.group_counts[round_index][gid * width:(gid + 1) * width]
+        for i, votes in enumerate(self.rounds[round_index].counts):
+            if votes < 0:
+                row[i] = -1
+        return row
+
+    def group_table(self, round_index, key=None):
+        # {group: {candidate name: votes}} for one round. key maps group
+        # labels onto coarser ones, e.g. key=lambda group: group[0] to roll
+        # (precinct, method) tags up to precincts.
+        table = {}
+        for gid, group in enumerate(self.groups):
+            label = group if key is None else key(group)
+            counts = table.setdefault(label, {})
+            for candidate, votes in zip(self.by_id, self.group_row(round_index, gid)):
+                if votes >= 0:
+                    counts[candidate.name] = counts.get(candidate.name, 0) + votes
+        return table
+
+    def group_history(self, group):
+        # The columnar round history of a single group's ballots
+        gid = self._group_ids[group]
+        counts = array('q')
+        for i in range(len(self.rounds)):
+            counts.extend(self.group_row(i, gid))
+        outcomes = [(round.eliminated_candidate, round.elected_candidate, round.is_tie, round.tie_broken)
+                    for round in self.rounds]
+        return RoundHistory([candidate.name for candidate in self.by_id], counts, outcomes)
+
+__all__ = ['GroupedBallot', 'GroupedElection']
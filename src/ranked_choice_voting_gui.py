@@ -1,7 +1,22 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
+import itertools
 import json
+import queue
+import threading
+from collections import Counter
 from ranked_choice_voting import Candidate, Election, InvalidBallotException
+from ranked_choice_voting_stream import stream_election
+from ranked_choice_voting_binary import BINARY_EXTENSION, load_election_binary, save_election_binary
+from ranked_choice_voting_cache import ResultsCache
+from ranked_choice_voting_history import RoundHistory
+
+BALLOT_PAGE_SIZE = 200
+POLL_INTERVAL_MS = 50
+LOAD_PROGRESS_EVERY = 50000
+
+class TabulationCancelled(Exception):
+    pass
 
 class RankedChoiceVotingGUI:
     def __init__(self, master):
@@ -9,6 +24,22 @@ class RankedChoiceVotingGUI:
         self.master.title("Ranked Choice Voting System")
         self.master.geometry("800x600")
 
+        self.election = None
+        self.candidate_rankings = {}
+        # Submitted ballots, aggregated by ranking
+        self.ballot_piles = Counter()
+        self.ballot_total = 0
+        self.ballot_page = 0
+        # Columnar history of the rounds published so far by the background
+        # tabulation, None until the first one arrives
+        self.history = None
+        self.worker = None
+        self.cancel_event = threading.Event()
+        self.messages = queue.Queue()
+        self.cache = ResultsCache()
+
+        self.create_status_bar()
+
         self.notebook = ttk.Notebook(self.master)
         self.notebook.pack(expand=True, fill="both")
 
@@ -17,8 +48,16 @@ class RankedChoiceVotingGUI:
         self.save_election_tab()
         self.view_results_tab()
 
-        self.election = None
-        self.candidate_rankings = {}
+    def create_status_bar(self):
+        bar = ttk.Frame(self.master)
+        bar.pack(side="bottom", fill="x")
+
+        self.status_label = ttk.Label(bar, text="Ready")
+        self.status_label.pack(side="left", padx=10, pady=5)
+        self.cancel_button = ttk.Button(bar, text="Cancel", command=self.cancel_task, state="disabled")
+        self.cancel_button.pack(side="right", padx=10, pady=5)
+        self.progress = ttk.Progressbar(bar, mode="indeterminate", length=200)
+        self.progress.pack(side="right", padx=10, pady=5)
 
     def create_new_election_tab(self):
         tab = ttk.Frame(self.notebook)
@@ -37,8 +76,23 @@ class RankedChoiceVotingGUI:
         ttk.Label(tab, text="Create Ballot:").grid(row=2, column=0, padx=10, pady=5)
         ttk.Button(tab, text="Submit Ballot", command=self.submit_ballot).grid(row=2, column=1, padx=10, pady=5)
 
-        self.ballots_listbox = tk.Listbox(tab)
-        self.ballots_listbox.grid(row=3, column=0, columnspan=3, padx=10, pady=5, sticky="nsew")
+        # Only one page of distinct rankings is ever inserted into the view
+        ballots_frame = ttk.Frame(tab)
+        ballots_frame.grid(row=3, column=0, columnspan=3, padx=10, pady=5, sticky="nsew")
+        self.ballots_view = ttk.Treeview(ballots_frame, columns=("count", "ranking"), show="headings")
+        self.ballots_view.heading("count", text="Ballots")
+        self.ballots_view.heading("ranking", text="Ranking")
+        self.ballots_view.column("count", width=80, anchor="e", stretch=False)
+        self.ballots_view.pack(expand=True, fill="both")
+
+        pager = ttk.Frame(ballots_frame)
+        pager.pack(fill="x")
+        ttk.Button(pager, text="< Previous",
+                   command=lambda: self.show_ballot_page(self.ballot_page - 1)).pack(side="left")
+        ttk.Button(pager, text="Next >",
+                   command=lambda: self.show_ballot_page(self.ballot_page + 1)).pack(side="left")
+        self.ballots_summary = ttk.Label(pager, text="No ballots yet")
+        self.ballots_summary.pack(side="left", padx=10)
 
         ttk.Button(tab, text="Run Election", command=self.run_election).grid(row=4, column=1, padx=10, pady=5)
 
@@ -106,79 +160,192 @@ class RankedChoiceVotingGUI:
             messagebox.showerror("Error", "Please rank at least one candidate.")
             return
         sorted_ballot = sorted(rankings, key=rankings.get)
-        self.ballots_listbox.insert(tk.END, ", ".join(sorted_ballot))
+        self.ballot_piles[tuple(sorted_ballot)] += 1
+        self.ballot_total += 1
+        self.show_ballot_page(self.ballot_page)
         for var in self.candidate_rankings.values():
             var.set("")  # Clear rankings after submission
 
+    def show_ballot_page(self, page):
+        pages = max(1, -(-len(self.ballot_piles) // BALLOT_PAGE_SIZE))
+        self.ballot_page = min(max(page, 0), pages - 1)
+        start = self.ballot_page * BALLOT_PAGE_SIZE
+        rows = list(itertools.islice(self.ballot_piles.items(), start, start + BALLOT_PAGE_SIZE))
+
+        self.ballots_view.delete(*self.ballots_view.get_children())
+        for ranking, count in rows:
+            self.ballots_view.insert("", tk.END, values=(count, ", ".join(ranking)))
+        if rows:
+            self.ballots_summary.config(text=f"Rankings {start + 1}-{start + len(rows)} of "
+                                             f"{len(self.ballot_piles)} ({self.ballot_total} ballots)")
+        else:
+            self.ballots_summary.config(text="No ballots yet")
+
     def run_election(self):
         if not self.candidate_rankings:
             messagebox.showerror("Error", "Please add candidates before running the election.")
             return
-        if self.ballots_listbox.size() == 0:
+        if not self.ballot_piles:
             messagebox.showerror("Error", "Please add at least one ballot before running the election.")
             return
 
-        candidates = [Candidate(c) for c in self.candidate_rankings.keys()]
-        self.election = Election(candidates)
+        names = list(self.candidate_rankings.keys())
+        piles = list(self.ballot_piles.items())
+
+        def build(report_progress):
+            election = Election([Candidate(name) for name in names])
+            for ranking, count in piles:
+                election.add_ballot(list(ranking), count)
+            return election
+
+        def show_winner(winner):
+            messagebox.showinfo("Election Result", f"The winner is: {winner}")
+
+        self.start_task("Counting ballots...", build, show_winner, "Invalid Ballot")
+
+    def start_task(self, status, build, on_done, error_title, tabulate=None):
+        # Loading and tabulation run on a worker thread. It only communicates
+        # through self.messages, which poll_worker drains on the Tk thread.
+        if self.worker is not None and self.worker.is_alive():
+            messagebox.showerror("Busy", "Please wait for the current count to finish or cancel it.")
+            return
+        self.cancel_event.clear()
+        self.history = None
+        self.round_var.set("")
+        self.status_label.config(text=status)
+        self.progress.start()
+        self.cancel_button.config(state="normal")
+        self.worker = threading.Thread(target=self.tabulate_in_background,
+                                       args=(build, on_done, error_title, tabulate), daemon=True)
+        self.worker.start()
+        self.master.after(POLL_INTERVAL_MS, self.poll_worker)
+
+    def tabulate_in_background(self, build, on_done, error_title, tabulate=None):
+        try:
+            election = build(self.report_progress)
+            self.check_cancelled()
+            election.add_observer(self.publish_round)
+            winner = tabulate(election) if tabulate else election.run_election()
+            self.messages.put(("done", election, winner, on_done))
+        except TabulationCancelled:
+            self.messages.put(("cancelled",))
+        except InvalidBallotException as e:
+            self.messages.put(("error", error_title, str(e)))
+        except Exception as e:
+            self.messages.put(("error", "Error", f"Failed to load election: {str(e)}"))
+
+    def check_cancelled(self):
+        if self.cancel_event.is_set():
+            raise TabulationCancelled()
+
+    def report_progress(self, ballots_read):
+        self.check_cancelled()
+        self.messages.put(("progress", f"{ballots_read} ballots read..."))
+
+    def publish_round(self, election, round):
+        self.check_cancelled()
+        self.messages.put(("round", round))
+
+    def cancel_task(self):
+        self.cancel_event.set()
+        self.status_label.config(text="Cancelling...")
 
-        for ballot in self.ballots_listbox.get(0, tk.END):
+    def finish_task(self, status):
+        self.progress.stop()
+        self.cancel_button.config(state="disabled")
+        self.status_label.config(text=status)
+
+    def poll_worker(self):
+        while True:
             try:
-                self.election.add_ballot(ballot.split(', '))
-            except InvalidBallotException as e:
-                messagebox.showerror("Invalid Ballot", str(e))
+                message = self.messages.get_nowait()
+            except queue.Empty:
+                break
+            kind = message[0]
+            if kind == "progress":
+                self.status_label.config(text=message[1])
+            elif kind == "round":
+                round = message[1]
+                if self.history is None:
+                    self.history = RoundHistory.from_rounds([round], round.candidates)
+                else:
+                    self.history.append(round)
+                self.status_label.config(text=f"Round {len(self.history)} counted")
+                self.update_results_view()
+            elif kind == "done":
+                _, self.election, winner, on_done = message
+                self.finish_task(f"Done: {winner}")
+                on_done(winner)
                 return
-
-        winner = self.election.run_election()
-        messagebox.showinfo("Election Result", f"The winner is: {winner}")
-        self.update_results_view()
+            elif kind == "cancelled":
+                self.finish_task("Cancelled")
+                return
+            elif kind == "error":
+                self.finish_task("Failed")
+                messagebox.showerror(message[1], message[2])
+                return
+        self.master.after(POLL_INTERVAL_MS, self.poll_worker)
 
     def load_election(self):
-        filename = filedialog.askopenfilename(filetypes=[("JSON files", "*.json")])
+        filename = filedialog.askopenfilename(filetypes=[("JSON files", "*.json"),
+                                                         ("JSON Lines files", "*.jsonl"),
+                                                         ("CSV files", "*.csv"),
+                                                         ("Binary election files", "*" + BINARY_EXTENSION)])
         if filename:
-            try:
-                with open(filename, 'r') as f:
-                    data = json.load(f)
-                candidates = [Candidate(name) for name in data["candidates"]]
-                self.election = Election(candidates)
-                for ballot in data["ballots"]:
-                    self.election.add_ballot(ballot)
-                self.election.run_election()
+            def load(report_progress):
+                if filename.lower().endswith(BINARY_EXTENSION):
+                    return load_election_binary(filename)
+                return stream_election(filename, progress=report_progress,
+                                       progress_every=LOAD_PROGRESS_EVERY)
+
+            def loaded(winner):
                 messagebox.showinfo("Election Loaded", "Election data loaded successfully")
-                self.update_results_view()
-            except Exception as e:
-                messagebox.showerror("Error", f"Failed to load election: {str(e)}")
+
+            # An unchanged file skips parsing; identical ballots skip the count
+            def load_cached(report_progress):
+                return self.cache.open(filename, lambda name: load(report_progress))
+
+            self.start_task(f"Loading {filename}...", load_cached, loaded, "Error",
+                            tabulate=self.cache.tabulate)
 
     def update_results_view(self, event=None):
-        if not self.election or not self.election.rounds:
+        history = self.history
+        if not history:
             return
 
-        self.round_dropdown['values'] = [f"Round {i+1}" for i in range(len(self.election.rounds))]
-        if not self.round_var.get():
+        # Keep following the newest round while rounds stream in, unless the
+        # user picked an earlier one
+        previous = self.round_dropdown['values']
+        following = not self.round_var.get() or (previous and self.round_var.get() == previous[-1])
+        self.round_dropdown['values'] = [f"Round {i+1}" for i in range(len(history))]
+        if following:
             self.round_var.set(self.round_dropdown['values'][-1])
 
         round_index = int(self.round_var.get().split()[-1]) - 1
-        round = self.election.rounds[round_index]
+        vote_counts = history.vote_counts(round_index)
+        eliminated, _, is_tie, tie_broken = history.outcomes[round_index]
 
         self.canvas.delete("all")
-        max_votes = max(round.vote_counts.values())
+        # Scaled to the largest count of any round, so bars compare across rounds
+        max_votes = history.max_votes
         bar_width = 30
         spacing = 10
         x_start = 50
         y_start = 20
 
-        for i, (candidate, votes) in enumerate(round.vote_counts.items()):
+        for i, (name, votes) in enumerate(vote_counts.items()):
             bar_height = (votes / max_votes) * 200 if max_votes > 0 else 0
             x = x_start + i * (bar_width + spacing)
             self.canvas.create_rectangle(x, y_start + 200 - bar_height, x + bar_width, y_start + 200, fill="blue")
-            self.canvas.create_text(x + bar_width/2, y_start + 210, text=candidate.name, angle=90, anchor="w")
+            self.canvas.create_text(x + bar_width/2, y_start + 210, text=name, angle=90, anchor="w")
             self.canvas.create_text(x + bar_width/2, y_start + 190 - bar_height, text=str(votes), anchor="s")
 
         info = f"Round {round_index + 1}\n"
-        if round.eliminated_candidate:
-            info += f"Eliminated: {round.eliminated_candidate}\n"
-        if round.is_tie:
+        if eliminated:
+            info += f"Eliminated: {eliminated}\n"
+        if is_tie:
             info += "This round was a tie.\n"
-            if round.tie_broken:
+            if tie_broken:
                 info += "Tie broken using next choice votes."
 
         self.info_text.delete(1.0, tk.END)
@@ -190,14 +357,21 @@ class RankedChoiceVotingGUI:
             return
 
         file_path = filedialog.asksaveasfilename(defaultextension=".json",
-                                                 filetypes=[("JSON files", "*.json")])
+                                                 filetypes=[("JSON files", "*.json"),
+                                                            ("Binary election files", "*" + BINARY_EXTENSION)])
         if not file_path:
             return  # User cancelled the save operation
 
         try:
+            if file_path.lower().endswith(BINARY_EXTENSION):
+                save_election_binary(self.election, file_path)
+                self.save_status.config(text=f"Election saved successfully to {file_path}")
+                return
+
             election_data = {
                 "candidates": [candidate.name for candidate in self.election.candidates.values()],
-                "ballots": [[candidate.name for candidate in ballot.rankings] for ballot in self.election.ballots]
+                "ballots": [ballot.names(self.election.by_id)
+                            for ballot in self.election.ballots for _ in range(ballot.count)]
             }
 
             with open(file_path, 'w') as f:
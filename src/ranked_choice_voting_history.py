@@ -0,0 +1,140 @@
+import csv
+from array import array
+
+class RoundHistory:
+    # Columnar copy of an election's rounds: one flat rounds x candidates
+    # array of counts (-1 for candidates no longer continuing) plus the
+    # per-round outcome fields. Views of a single round, a candidate's column
+    # or a round's transfers are built only when asked for, and the maximum
+    # used to scale charts is computed once.
+    def __init__(self, names, counts, outcomes, recorded=None):
+        self.names = list(names)
+        self.width = len(self.names)
+        self.counts = counts
+        # (eliminated, elected, is_tie, tie_broken) for each round
+        self.outcomes = list(outcomes)
+        # Round.transfers for each round, where the tabulator recorded them
+        self.recorded = list(recorded) if recorded is not None else [None] * len(self.outcomes)
+        self.max_votes = max(max(counts, default=0), 0)
+        self._source = None
+
+    @classmethod
+    def from_election(cls, election):
+        return cls.from_rounds(election.rounds, election.by_id)
+
+    @classmethod
+    def of(cls, election):
+        # The election's history, built once and kept on the election. Rounds
+        # added since the last call are appended; a recount replaces
+        # election.rounds, which starts a new history.
+        history = getattr(election, "_round_history", None)
+        if history is None or history._source is not election.rounds or len(history) > len(election.rounds):
+            history = cls.from_election(election)
+            history._source = election.rounds
+            election._round_history = history
+        for round in election.rounds[len(history):]:
+            history.append(round)
+        return history
+
+    @classmethod
+    def from_rounds(cls, rounds, candidates):
+        typecode = rounds[0].counts.typecode if rounds else 'q'
+        counts = array(typecode)
+        for round in rounds:
+            counts.extend(round.counts)
+        outcomes = [(round.eliminated_candidate, round.elected_candidate,
+                     round.is_tie, round.tie_broken) for round in rounds]
+        return cls([candidate.name for candidate in candidates], counts, outcomes,
+                   [round.transfers for round in rounds])
+
+    def __len__(self):
+        return len(self.outcomes)
+
+    def append(self, round):
+        # Adds a finished round, e.g. as rounds stream in from a running count
+        self.counts.extend(round.counts)
+        self.outcomes.append((round.eliminated_candidate, round.elected_candidate,
+                              round.is_tie, round.tie_broken))
+        self.recorded.append(round.transfers)
+        self.max_votes = max(self.max_votes, max(round.counts, default=0))
+
+    def row(self, i):
+        return self.counts[i * self.width:(i + 1) * self.width]
+
+    def column(self, name):
+        return self.counts[self.names.index(name)::self.width]
+
+    def vote_counts(self, i):
+        return {name: votes for name, votes in zip(self.names, self.row(i)) if votes >= 0}
+
+    def transfers(self, i):
+        # Where the votes leaving candidates in round i went by round i + 1:
+        # {candidate: change} for every candidate whose total moved, plus
+        # "exhausted" for votes that left the count. Negative entries are the
+        # sources, which is the eliminated candidate (or an elected candidate's
+        # surplus in STV). None for the last round.
+        if i + 1 >= len(self):
+            return None
+        before, after = self.row(i), self.row(i + 1)
+        moved = {}
+        for name, old, new in zip(self.names, before, after):
+            if old < 0:
+                continue
+            change = max(new, 0) - old
+            if change:
+                moved[name] = change
+        exhausted = -sum(moved.values())
+        if exhausted:
+            moved["exhausted"] = exhausted
+        return moved
+
+    def transfer_matrix(self, i):
+        # Source rows by receiver columns (candidates, then "exhausted"). Rows
+        # come from the transfers the tabulator recorded as ballots moved.
+        # Without them, the net changes only tell a single source's row apart;
+        # several sources leaving together share one row under their joined
+        # names.
+        moved = self.transfers(i)
+        if moved is None:
+            return None
+        recorded = self.recorded[i]
+        if recorded:
+            return {self.names[source]: list(row) for source, row in recorded.items()}
+        sources = [name for name, change in moved.items() if change < 0 and name != "exhausted"]
+        received = {name: change for name, change in moved.items() if change > 0}
+        return {", ".join(sources): [received.get(name, 0) for name in self.names + ["exhausted"]]}
+
+    def columns(self):
+        # Plain column lists, ready for a CSV or columnar file writer
+        data = {"round": list(range(1, len(self) + 1))}
+        for field, index in (("eliminated", 0), ("elected", 1), ("is_tie", 2), ("tie_broken", 3)):
+            data[field] = [outcome[index] for outcome in self.outcomes]
+        for name in self.names:
+            data[name] = [votes if votes >= 0 else None for votes in self.column(name)]
+        return data
+
+    def write_csv(self, filename):
+        data = self.columns()
+        with open(filename, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(list(data))
+            writer.writerows(zip(*data.values()))
+
+    def write_transfers_csv(self, filename):
+        # Long format: one row per round, source and receiver
+        with open(filename, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["round", "from", "to", "votes"])
+            for i in range(len(self) - 1):
+                for source, row in self.transfer_matrix(i).items():
+                    for name, votes in zip(self.names + ["exhausted"], row):
+                        if votes:
+                            writer.writerow([i + 1, source, name, votes])
+
+    def write_parquet(self, filename):
+        # pyarrow is optional and only needed for this export
+        import pyarrow
+        import pyarrow.parquet
+        pyarrow.parquet.write_table(pyarrow.table(self.columns()), filename)
+
+__all__ = ['RoundHistory']
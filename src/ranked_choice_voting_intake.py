@@ -0,0 +1,146 @@
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+
+BATCH_SIZE = 1000
+QUEUE_SIZE = 8
+
+def parse_ballot(line):
+    # Accepts the CLI's comma-separated format or a JSON list of names
+    line = line.strip()
+    if line.startswith("["):
+        ballot = json.loads(line)
+        if not isinstance(ballot, list) or not all(isinstance(name, str) for name in ballot):
+            raise ValueError(f"Ballot is not a list of candidate names: {line}")
+        return ballot
+    return [name.strip() for name in line.split(",") if name.strip()]
+
+async def file_source(filename, batch_size=BATCH_SIZE):
+    with open(filename, "r") as f:
+        while True:
+            batch = await asyncio.to_thread(lambda: [line for _, line in zip(range(batch_size), f)])
+            if not batch:
+                return
+            yield batch
+
+async def stream_source(reader, batch_size=BATCH_SIZE):
+    # Reads newline-delimited ballots from an asyncio.StreamReader, such as
+    # the reader side of asyncio.open_connection or connect_read_pipe
+    batch = []
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        batch.append(line.decode("utf-8"))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+async def fake_scanner(candidates, ballots, batch_size=BATCH_SIZE, seed=0, delay=0.0):
+    # Stand-in for a ballot scanner: emits random rankings in batches
+    rng = random.Random(seed)
+    while ballots > 0:
+        size = min(batch_size, ballots)
+        yield [", ".join(rng.sample(candidates, rng.randint(1, len(candidates)))) for _ in range(size)]
+        ballots -= size
+        await asyncio.sleep(delay)
+
+class IntakeMetrics:
+    def __init__(self):
+        self.batches = 0
+        self.received = 0
+        self.parse_errors = 0
+        self.invalid = 0
+        self.accepted = 0
+        # Time sources spent waiting on a full queue, i.e. backpressure
+        self.blocked_time = 0.0
+        self.started = None
+        self.finished = None
+
+    def elapsed(self):
+        end = self.finished if self.finished is not None else time.perf_counter()
+        return end - self.started if self.started is not None else 0.0
+
+    def throughput(self):
+        elapsed = self.elapsed()
+        return self.accepted / elapsed if elapsed else 0.0
+
+class IntakePipeline:
+    # Parse, validate and aggregate stages connected by bounded queues. When
+    # a later stage falls behind, the queues fill and the sources block on
+    # put(), which slows intake instead of buffering without limit. If any
+    # source or stage fails, everything else is cancelled and the error is
+    # raised from run(), rather than leaving sources blocked on a full queue.
+    def __init__(self, election, queue_size=QUEUE_SIZE):
+        self.election = election
+        self.queue_size = queue_size
+        self.metrics = IntakeMetrics()
+
+    async def _produce(self, source, queue):
+        async for batch in source:
+            self.metrics.batches += 1
+            self.metrics.received += len(batch)
+            start = time.perf_counter()
+            await queue.put(batch)
+            self.metrics.blocked_time += time.perf_counter() - start
+
+    async def _produce_all(self, sources, queue):
+        await asyncio.gather(*(self._produce(source, queue) for source in sources))
+        await queue.put(None)
+
+    async def _parse(self, inbox, outbox):
+        while (batch := await inbox.get()) is not None:
+            parsed = []
+            for line in batch:
+                try:
+                    parsed.append(parse_ballot(line))
+                except ValueError:
+                    self.metrics.parse_errors += 1
+            await outbox.put(parsed)
+        await outbox.put(None)
+
+    async def _validate(self, inbox, outbox):
+        while (batch := await inbox.get()) is not None:
+            report = self.election.validate_ballots(batch)
+            invalid = set(report.invalid_indices())
+            self.metrics.invalid += len(invalid)
+            await outbox.put(Counter(tuple(rankings) for i, rankings in enumerate(batch)
+                                     if i not in invalid))
+        await outbox.put(None)
+
+    async def _aggregate(self, inbox):
+        while (piles := await inbox.get()) is not None:
+            for rankings, count in piles.items():
+                self.election.add_ballot(rankings, count)
+            self.metrics.accepted += sum(piles.values())
+            # Give the other stages a turn between batches
+            await asyncio.sleep(0)
+
+    async def run(self, sources):
+        self.metrics.started = time.perf_counter()
+        raw = asyncio.Queue(self.queue_size)
+        parsed = asyncio.Queue(self.queue_size)
+        valid = asyncio.Queue(self.queue_size)
+        tasks = [
+            asyncio.create_task(self._produce_all(sources, raw)),
+            asyncio.create_task(self._parse(raw, parsed)),
+            asyncio.create_task(self._validate(parsed, valid)),
+            asyncio.create_task(self._aggregate(valid)),
+        ]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                task.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self.metrics.finished = time.perf_counter()
+        return self.metrics
+
+__all__ = ['IntakeMetrics', 'IntakePipeline', 'fake_scanner', 'file_source',
+           'parse_ballot', 'stream_source']
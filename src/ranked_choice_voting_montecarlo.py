@@ -0,0 +1,206 @@
+import multiprocessing
+import os
+from collections import Counter
+import numpy as np
+
+NO_WINNER = -1
+
+class BatchTabulator:
+    # Tabulates many elections at once over one shared set of distinct
+    # rankings. Each election is a row of pile counts; the rankings are a
+    # matrix padded with a sentinel candidate (index len(names)) that is never
+    # eliminated. Round by round, every undecided election gets a weighted
+    # bincount of its piles' current choices, then the same majority, tie and
+    # elimination rules as Election.run_election are applied to all rows as
+    # array operations.
+    def __init__(self, names, rankings):
+        self.names = list(names)
+        sentinel = len(self.names)
+        width = max((len(ranking) for ranking in rankings), default=0) + 1
+        self.matrix = np.full((len(rankings), width), sentinel, dtype=np.int64)
+        for row, ranking in enumerate(rankings):
+            self.matrix[row, :len(ranking)] = ranking
+
+    @classmethod
+    def from_election(cls, election):
+        # Rankings and their observed counts, e.g. to resample a poll
+        tabulator = cls([candidate.name for candidate in election.by_id],
+                        [list(ballot.rankings) for ballot in election.ballots])
+        return tabulator, np.array([ballot.count for ballot in election.ballots], dtype=np.int64)
+
+    def _tally(self, counts, choices):
+        n, width = len(counts), len(self.names) + 1
+        flat = (np.arange(n)[:, None] * width + choices).ravel()
+        votes = np.bincount(flat, weights=counts.ravel(), minlength=n * width)
+        return votes.reshape(n, width)[:, :-1].astype(np.int64)
+
+    def _next_choice_votes(self, counts, pointers, continuing):
+        # count_next_choice_votes for tied rows: the first continuing choice
+        # at or after max(current position, 1) on every ballot still counting
+        n = len(counts)
+        sentinel = len(self.names)
+        allowed = np.zeros((n, sentinel + 1), dtype=bool)
+        allowed[:, :sentinel] = continuing
+        hits = allowed[np.arange(n)[:, None, None], self.matrix[None, :, :]]
+        positions = np.arange(self.matrix.shape[1])
+        hits &= positions[None, None, :] >= np.maximum(pointers, 1)[:, :, None]
+        counting = self.matrix[np.arange(len(self.matrix))[None, :], pointers] != sentinel
+        found = hits.any(axis=2) & counting
+        choices = self.matrix[np.arange(len(self.matrix))[None, :], hits.argmax(axis=2)]
+        return self._tally(np.where(found, counts, 0), np.where(found, choices, sentinel))
+
+    def tabulate(self, counts):
+        # counts: simulations x rankings. Returns (winners, elimination
+        # orders, final margins, closest elimination margins, rounds), the
+        # margins matching BallotStore.tabulate and NaN where undefined.
+        counts = np.asarray(counts, dtype=np.int64)
+        simulations = len(counts)
+        candidates = len(self.names)
+        rankings = np.arange(len(self.matrix))
+        eliminated = np.zeros((simulations, candidates + 1), dtype=bool)
+        pointers = np.zeros((simulations, len(self.matrix)), dtype=np.int64)
+        winners = np.full(simulations, NO_WINNER, dtype=np.int64)
+        undecided = np.ones(simulations, dtype=bool)
+        final_margins = np.full(simulations, np.nan)
+        closest = np.full(simulations, np.nan)
+        rounds = np.zeros(simulations, dtype=np.int64)
+        eliminations = []
+
+        while undecided.any():
+            rows = np.flatnonzero(undecided)
+            rounds[rows] += 1
+            continuing = ~eliminated[rows, :candidates]
+            votes = self._tally(counts[rows], self.matrix[rankings[None, :], pointers[rows]])
+            remaining = continuing.sum(axis=1)
+            if candidates > 1:
+                ordered = -np.sort(-np.where(continuing, votes, -1), axis=1)
+                contested = remaining >= 2
+                final_margins[rows[contested]] = (ordered[:, 0] - ordered[:, 1])[contested]
+
+            decided = remaining == 0
+            total = np.where(continuing, votes, 0).sum(axis=1)
+            majority = continuing & (2 * votes > total[:, None]) & ~decided[:, None]
+            has_majority = majority.any(axis=1)
+            winners[rows[has_majority]] = majority.argmax(axis=1)[has_majority]
+            decided |= has_majority
+
+            high = np.where(continuing, votes, np.iinfo(np.int64).min).max(axis=1)
+            low = np.where(continuing, votes, np.iinfo(np.int64).max).min(axis=1)
+            tied = ~decided & (remaining > 1) & (high == low)
+            if tied.any():
+                tie_rows = rows[tied]
+                next_votes = self._next_choice_votes(counts[tie_rows], pointers[tie_rows], continuing[tied])
+                best = next_votes.max(axis=1)
+                unique = (best > 0) & ((next_votes == best[:, None]).sum(axis=1) == 1)
+                winners[tie_rows[unique]] = next_votes.argmax(axis=1)[unique]
+                decided |= tied
+
+            eliminating = ~decided
+            losers = continuing & (votes == low[:, None]) & eliminating[:, None]
+            measured = eliminating & (remaining > 2)
+            if measured.any():
+                gaps = np.sort(np.where(continuing, votes, np.iinfo(np.int64).max), axis=1)
+                closest[rows[measured]] = np.fmin(closest[rows[measured]], (gaps[:, 1] - gaps[:, 0])[measured])
+            new = np.zeros((simulations, candidates), dtype=bool)
+            new[rows] = losers
+            eliminations.append(new)
+            eliminated[rows, :candidates] |= losers
+
+            # Piles sitting on an eliminated candidate move to their next choice
+            moving = rows[eliminating]
+            if len(moving):
+                position = pointers[moving]
+                while True:
+                    stuck = eliminated[moving[:, None], self.matrix[rankings[None, :], position]]
+                    if not stuck.any():
+                        break
+                    position[stuck] += 1
+                pointers[moving] = position
+                left = (~eliminated[moving, :candidates]).sum(axis=1)
+                last = left == 1
+                winners[moving[last]] = (~eliminated[moving[last], :candidates]).argmax(axis=1)
+                decided[eliminating] = left <= 1
+            undecided[rows[decided]] = False
+
+        orders = [tuple(", ".join(self.names[c] for c in np.flatnonzero(new[s])) for new in eliminations
+                        if new[s].any()) for s in range(simulations)]
+        return winners, orders, final_margins, closest, rounds
+
+def polling_counts(shares, voters, simulations, concentration=None, seed=0):
+    # Draws simulations x rankings pile counts of voters ballots each from
+    # the ranking shares. With a concentration, each simulation first draws
+    # its own shares from a Dirichlet around them to model polling error.
+    rng = np.random.default_rng(seed)
+    shares = np.asarray(shares, dtype=float)
+    shares = shares / shares.sum()
+    if concentration is None:
+        return rng.multinomial(voters, shares, size=simulations)
+    drawn = rng.dirichlet(np.maximum(shares * concentration, 1e-9), size=simulations)
+    return np.stack([rng.multinomial(voters, p) for p in drawn])
+
+class SimulationReport:
+    def __init__(self, names, winners, orders, final_margins, closest, rounds):
+        self.names = names
+        self.winners = winners
+        self.orders = orders
+        self.final_margins = final_margins
+        self.closest = closest
+        self.rounds = rounds
+
+    def winner_frequencies(self):
+        counts = np.bincount(self.winners + 1, minlength=len(self.names) + 1)
+        frequencies = {name: float(counts[i + 1] / len(self.winners)) for i, name in enumerate(self.names)}
+        frequencies["No winner"] = float(counts[0] / len(self.winners))
+        return frequencies
+
+    def elimination_orders(self):
+        return Counter(self.orders)
+
+    def margin_summary(self, margins=None):
+        margins = self.final_margins if margins is None else margins
+        margins = margins[~np.isnan(margins)]
+        if not len(margins):
+            return None
+        p05, median, p95 = np.percentile(margins, [5, 50, 95])
+        return {"mean": float(margins.mean()), "stdev": float(margins.std()), "min": float(margins.min()),
+                "p05": float(p05), "median": float(median), "p95": float(p95)}
+
+    def to_dict(self):
+        return {
+            "simulations": len(self.winners),
+            "winners": self.winner_frequencies(),
+            "elimination_orders": [[list(order), count]
+                                   for order, count in self.elimination_orders().most_common()],
+            "final_margin": self.margin_summary(),
+            "elimination_margin": self.margin_summary(self.closest),
+            "mean_rounds": float(self.rounds.mean()) if len(self.rounds) else 0.0,
+        }
+
+_worker_tabulator = None
+
+def _init_worker(tabulator):
+    global _worker_tabulator
+    _worker_tabulator = tabulator
+
+def _tabulate_batch(counts):
+    return _worker_tabulator.tabulate(counts)
+
+def simulate(tabulator, counts, processes=None, batch_size=1000):
+    # Splits the simulations into batches tabulated across a process pool;
+    # processes=1 runs them in this process
+    counts = np.asarray(counts, dtype=np.int64)
+    batches = [counts[start:start + batch_size] for start in range(0, len(counts), batch_size)]
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or len(batches) <= 1:
+        results = [tabulator.tabulate(batch) for batch in batches]
+    else:
+        with multiprocessing.get_context().Pool(min(processes, len(batches)), initializer=_init_worker,
+                                                initargs=(tabulator,)) as pool:
+            results = pool.map(_tabulate_batch, batches)
+    if not results:
+        results = [tabulator.tabulate(counts)]
+    winners, orders, final_margins, closest, rounds = zip(*results)
+    return SimulationReport(tabulator.names, np.concatenate(winners), [o for batch in orders for o in batch],
+                            np.concatenate(final_margins), np.concatenate(closest), np.concatenate(rounds))
+
+__all__ = ['BatchTabulator', 'SimulationReport', 'polling_counts', 'simulate', 'NO_WINNER']
@@ -0,0 +1,77 @@
+import numpy as np
+from ranked_choice_voting import Election
+
+# Ballot piles are rows of candidate indices padded with a sentinel (the number
+# of candidates) plus a pointer per row to its current choice. Round counts are
+# a weighted bincount over the pointed-to entries, and eliminations advance the
+# pointers of the affected rows.
+class ArrayElection(Election):
+    def __init__(self, candidates):
+        super().__init__(candidates)
+        self._matrix = None
+
+    def start_count(self):
+        self.rounds = []
+        sentinel = len(self.by_id)
+        # The extra column guarantees every row ends in the sentinel
+        width = max((len(ballot.rankings) for ballot in self.ballots), default=0) + 1
+        self._matrix = np.full((len(self.ballots), width), sentinel, dtype=np.int32)
+        for row, ballot in enumerate(self.ballots):
+            self._matrix[row, :len(ballot.rankings)] = np.frombuffer(ballot.rankings, dtype=np.uint16)
+        self._weights = np.fromiter((ballot.count for ballot in self.ballots), dtype=np.int64,
+                                    count=len(self.ballots))
+        self._rows = np.arange(len(self.ballots))
+        self._pointers = np.zeros(len(self.ballots), dtype=np.int64)
+        # The sentinel slot is never eliminated, so pointers stop there
+        self._eliminated = np.zeros(sentinel + 1, dtype=bool)
+        for candidate in self.by_id:
+            candidate.eliminated = False
+        self._touched += int(self._weights.sum())
+        self._piles_touched += len(self.ballots)
+
+    def _tally(self, choices, weights):
+        votes = np.bincount(choices, weights=weights, minlength=len(self.by_id) + 1)
+        return votes.astype(np.int64)
+
+    def count_votes(self):
+        if self._matrix is None:
+            self.start_count()
+        votes = self._tally(self._matrix[self._rows, self._pointers], self._weights)
+        return {candidate: int(votes[i]) for i, candidate in enumerate(self.by_id)
+                if not self._eliminated[i]}
+
+    def count_next_choice_votes(self, candidates_to_check):
+        if self._matrix is None:
+            self.start_count()
+        if not len(self._rows):
+            return {}
+        allowed = np.zeros(len(self.by_id) + 1, dtype=bool)
+        for candidate in candidates_to_check:
+            allowed[candidate.id] = not self._eliminated[candidate.id]
+        tail = self._matrix[:, 1:]
+        hits = allowed[tail]
+        has_choice = hits.any(axis=1)
+        first = hits.argmax(axis=1)
+        choices = tail[self._rows[has_choice], first[has_choice]]
+        votes = self._tally(choices, self._weights[has_choice])
+        return {candidate: int(votes[i]) for i, candidate in enumerate(self.by_id) if votes[i]}
+
+    def eliminate_candidate(self, candidate):
+        candidate.eliminated = True
+        if self._matrix is None:
+            return
+        # run_election marks every candidate going out this round first, so
+        # ballots skip all of them in one move, as in Election
+        for other in self.by_id:
+            if other.eliminated:
+                self._eliminated[other.id] = True
+        moved = moving = self._rows[self._eliminated[self._matrix[self._rows, self._pointers]]]
+        while len(moving):
+            self._pointers[moving] += 1
+            moving = moving[self._eliminated[self._matrix[moving, self._pointers[moving]]]]
+        weights = self._weights[moved]
+        self._touched += int(weights.sum())
+        self._piles_touched += len(moved)
+        self._exhausted += int(weights[self._matrix[moved, self._pointers[moved]] == len(self.by_id)].sum())
+
+__all__ = ['ArrayElection']
@@ -0,0 +1,65 @@
+from array import array
+
+class PairwiseMatrix:
+    # wins[a][b] counts the voters who rank candidate a above candidate b,
+    # where a ranked candidate is above every candidate the ballot leaves
+    # unranked. Updated one ballot pile at a time, so building it costs one
+    # pass over the distinct rankings and new ballots only add their own pile.
+    def __init__(self, candidates):
+        self.candidates = candidates
+        self.wins = [array('q', [0]) * len(candidates) for _ in candidates]
+
+    @classmethod
+    def from_election(cls, election):
+        matrix = cls(election.by_id)
+        for ballot in election.ballots:
+            matrix.add(ballot.rankings, ballot.count)
+        return matrix
+
+    def add(self, rankings, count=1):
+        ranked = set(rankings)
+        unranked = [i for i in range(len(self.candidates)) if i not in ranked]
+        for position, winner in enumerate(rankings):
+            row = self.wins[winner]
+            for loser in rankings[position + 1:]:
+                row[loser] += count
+            for loser in unranked:
+                row[loser] += count
+
+    def margin(self, a, b):
+        return self.wins[a.id][b.id] - self.wins[b.id][a.id]
+
+    def _beats_all(self, candidate, sign):
+        return all(sign * self.margin(candidate, other) > 0
+                   for other in self.candidates if other is not candidate)
+
+    def condorcet_winner(self):
+        for candidate in self.candidates:
+            if self._beats_all(candidate, 1):
+                return candidate
+        return None
+
+    def condorcet_loser(self):
+        for candidate in self.candidates:
+            if self._beats_all(candidate, -1):
+                return candidate
+        return None
+
+    def to_dict(self):
+        return {a.name: {b.name: self.wins[a.id][b.id] for b in self.candidates if b is not a}
+                for a in self.candidates}
+
+def find_spoilers(election):
+    # A spoiler is a losing candidate whose withdrawal changes the IRV winner
+    from ranked_choice_voting_whatif import WhatIfAnalysis
+    analysis = WhatIfAnalysis(election)
+    winner, _ = analysis.outcome()
+    spoilers = {}
+    for name in analysis.names:
+        if name != winner:
+            new_winner, _ = analysis.outcome([name])
+            if new_winner != winner:
+                spoilers[name] = new_winner
+    return spoilers
+
+__all__ = ['PairwiseMatrix', 'find_spoilers']
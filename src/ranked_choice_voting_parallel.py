@@ -0,0 +1,161 @@
+import multiprocessing
+import os
+from ranked_choice_voting import Election
+
+def _tabulation_worker(conn, candidate_count):
+    # Holds one shard of ballot piles for the lifetime of the process. Each
+    # pile points at its current continuing choice and sits in that
+    # candidate's bucket, so eliminations only touch the affected piles.
+    rankings, counts, pointers = [], [], []
+    buckets = [[] for _ in range(candidate_count)]
+    totals = [0] * candidate_count
+    eliminated = [False] * candidate_count
+
+    def assign(i):
+        ranking = rankings[i]
+        rank = pointers[i]
+        while rank < len(ranking) and eliminated[ranking[rank]]:
+            rank += 1
+        pointers[i] = rank
+        if rank < len(ranking):
+            buckets[ranking[rank]].append(i)
+            totals[ranking[rank]] += counts[i]
+
+    while True:
+        message = conn.recv()
+        if message is None:
+            break
+        command, payload = message
+        if command in ("load", "restart"):
+            # A restart recounts the resident shard from first choices
+            if command == "load":
+                rankings, counts = payload
+            pointers = [0] * len(rankings)
+            buckets = [[] for _ in range(candidate_count)]
+            totals = [0] * candidate_count
+            eliminated = [False] * candidate_count
+            for i in range(len(rankings)):
+                assign(i)
+            conn.send(totals)
+        elif command == "eliminate":
+            for candidate in payload:
+                eliminated[candidate] = True
+            for candidate in payload:
+                moved, buckets[candidate] = buckets[candidate], []
+                totals[candidate] = 0
+                for i in moved:
+                    assign(i)
+            conn.send(totals)
+        elif command == "next_choice":
+            next_counts = [0] * candidate_count
+            for ranking, count in zip(rankings, counts):
+                for choice in ranking[1:]:
+                    if choice in payload:
+                        next_counts[choice] += count
+                        break
+            conn.send(next_counts)
+    conn.close()
+
+class ParallelElection(Election):
+    # Piles move inside the workers, so RoundStats can't count them
+    tracks_ballot_movement = False
+
+    # Ballot piles are split into shards that stay resident in worker
+    # processes. Shards are only sent again when piles were added since the
+    # last load; otherwise a recount just tells the workers to restart. Each
+    # round only the newly eliminated candidate IDs are broadcast and the
+    # per-shard totals are summed.
+    def __init__(self, candidates, processes=None):
+        super().__init__(candidates)
+        self.processes = processes or os.cpu_count() or 1
+        self._workers = []
+        self._vote_totals = None
+        self._pending = []
+        self._shards_loaded = False
+        # Number of shard loads sent, for checking residency
+        self.loads = 0
+
+    def _add_pile(self, ids, count):
+        super()._add_pile(ids, count)
+        self._shards_loaded = False
+
+    def set_pile_counts(self, counts):
+        super().set_pile_counts(counts)
+        self._shards_loaded = False
+
+    def _start_workers(self, count):
+        context = multiprocessing.get_context()
+        while len(self._workers) < count:
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(target=_tabulation_worker,
+                                      args=(child_conn, len(self.candidates)), daemon=True)
+            process.start()
+            child_conn.close()
+            self._workers.append((process, parent_conn))
+
+    def _broadcast(self, command, payload=None):
+        for _, conn in self._workers:
+            conn.send((command, payload))
+        return [sum(column) for column in zip(*(conn.recv() for _, conn in self._workers))]
+
+    def start_count(self):
+        self.rounds = []
+        for candidate in self.by_id:
+            candidate.eliminated = False
+        self._pending = []
+        workers = len(self._workers)
+        self._start_workers(max(1, min(self.processes, len(self.ballots))))
+        if self._shards_loaded and len(self._workers) == workers:
+            self._vote_totals = self._broadcast("restart")
+            return
+        shards = len(self._workers)
+        for shard, (_, conn) in enumerate(self._workers):
+            piles = self.ballots[shard::shards]
+            conn.send(("load", ([ballot.rankings for ballot in piles], [ballot.count for ballot in piles])))
+        self._vote_totals = [sum(column) for column in
+                             zip(*(conn.recv() for _, conn in self._workers))]
+        self._shards_loaded = True
+        self.loads += 1
+
+    def _flush_eliminations(self):
+        if self._pending:
+            self._vote_totals = self._broadcast("eliminate", self._pending)
+            self._pending = []
+
+    def count_votes(self):
+        if self._vote_totals is None:
+            self.start_count()
+        self._flush_eliminations()
+        return {candidate: self._vote_totals[i] for i, candidate in enumerate(self.by_id)
+                if not candidate.eliminated}
+
+    def count_next_choice_votes(self, candidates_to_check):
+        if self._vote_totals is None:
+            self.start_count()
+        self._flush_eliminations()
+        allowed = {c.id for c in candidates_to_check if not c.eliminated}
+        next_counts = self._broadcast("next_choice", allowed)
+        return {candidate: next_counts[i] for i, candidate in enumerate(self.by_id) if next_counts[i]}
+
+    def eliminate_candidate(self, candidate):
+        candidate.eliminated = True
+        if self._vote_totals is not None:
+            self._pending.append(candidate.id)
+
+    def close(self):
+        for process, conn in self._workers:
+            conn.send(None)
+            conn.close()
+        for process, _ in self._workers:
+            process.join()
+        self._workers = []
+        self._vote_totals = None
+        self._shards_loaded = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+__all__ = ['ParallelElection']
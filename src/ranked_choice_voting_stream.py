@@ -0,0 +1,160 @@
+import csv
+import json
+import os
+from ranked_choice_voting import Candidate, Election, InvalidBallotException
+
+CHUNK_SIZE = 1 << 16
+PROGRESS_EVERY = 100000
+# The longest token that can be cut off at the end of a chunk and still
+# parse once the rest arrives, e.g. -Infinity or a \uXXXX escape
+_LONGEST_TOKEN = 10
+
+class _JSONReader:
+    # Pulls one JSON value at a time out of a file, keeping only the unread
+    # tail of the current chunk in memory.
+    def __init__(self, f, chunk_size=None):
+        self.f = f
+        # Looked up per reader, so the module setting can be changed
+        self.chunk_size = chunk_size or CHUNK_SIZE
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+
+    def _fill(self):
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, *chars):
+        char = self.peek()
+        if char not in chars:
+            expected = " or ".join(f"'{c}'" for c in chars)
+            raise json.JSONDecodeError(f"Expecting {expected}", self.buffer, self.pos)
+        self.pos += 1
+        return char
+
+    def _cut_off(self, error):
+        if error.msg.startswith("Unterminated string"):
+            return True
+        return len(self.buffer) - error.pos <= _LONGEST_TOKEN
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as e:
+                # Only a value cut off by the end of the buffer is worth
+                # reading more for; anything else is bad input, and reading
+                # on would pull the rest of the file into memory
+                if not self._cut_off(e) or not self._fill():
+                    raise
+                continue
+            # A number at the very end of the buffer may continue in the next chunk
+            if end == len(self.buffer) and self._fill():
+                continue
+            self.pos = end
+            return value
+
+def _json_records(f):
+    reader = _JSONReader(f)
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+    seen_candidates = False
+    while True:
+        key = reader.value()
+        reader.expect(":")
+        if key == "ballots":
+            if not seen_candidates:
+                raise ValueError("Election file must list candidates before ballots")
+            reader.expect("[")
+            if reader.peek() == "]":
+                reader.pos += 1
+            else:
+                while True:
+                    yield reader.value(), 1
+                    if reader.expect(",", "]") == "]":
+                        break
+        else:
+            value = reader.value()
+            if key == "candidates":
+                seen_candidates = True
+                yield value
+        if reader.expect(",", "}") == "}":
+            return
+
+def _json_lines_records(f):
+    for line in f:
+        line = line.strip()
+        if not line:
+            continue
+        record = json.loads(line)
+        if isinstance(record, dict) and "candidates" in record:
+            yield record["candidates"]
+        elif isinstance(record, dict):
+            if "ranking" not in record:
+                raise ValueError(f"Ballot record has no ranking: {line}")
+            yield record["ranking"], record.get("count", 1)
+        else:
+            yield record, 1
+
+def _csv_records(f):
+    rows = csv.reader(f)
+    header = next(rows, None)
+    if header is None:
+        return
+    yield [name.strip() for name in header if name.strip()]
+    for row in rows:
+        ranking = [name.strip() for name in row if name.strip()]
+        if ranking:
+            yield ranking, 1
+
+READERS = {
+    ".jsonl": _json_lines_records,
+    ".ndjson": _json_lines_records,
+    ".csv": _csv_records,
+}
+
+def stream_election(filename, election_class=Election, on_invalid=None,
+                    progress=None, progress_every=PROGRESS_EVERY):
+    # Ballots go straight into the election's piles as they are read, so memory
+    # is bounded by the number of distinct rankings rather than the file size.
+    reader = READERS.get(os.path.splitext(filename)[1].lower(), _json_records)
+    with open(filename, "r", newline="") as f:
+        records = reader(f)
+        names = next(records, None)
+        if names is None:
+            raise ValueError(f"No candidates found in {filename}")
+        election = election_class([Candidate(name) for name in names])
+        election.warn_incomplete_ballots = False
+        ballots_read = 0
+        next_report = progress_every
+        for ranking, count in records:
+            try:
+                election.add_ballot(ranking, count)
+            except InvalidBallotException as e:
+                if on_invalid is None:
+                    raise
+                on_invalid(e)
+            ballots_read += count
+            if progress and ballots_read >= next_report:
+                progress(ballots_read)
+                next_report = ballots_read + progress_every
+        if progress:
+            progress(ballots_read)
+    return election
+
+__all__ = ['stream_election', 'READERS']
@@ -0,0 +1,162 @@
+from array import array
+from ranked_choice_voting import Election, Round, make_tie_break
+
+MEEK_TOLERANCE = 1e-9
+MEEK_MAX_ITERATIONS = 1000
+
+def droop_quota(votes, seats):
+    return int(votes // (seats + 1)) + 1
+
+class STVElection(Election):
+    # Multi-seat single transferable vote over the same ballot piles as
+    # Election. Each pile carries a float transfer weight; Gregory surplus
+    # transfers and eliminations only move the piles in the affected
+    # candidate's bucket. Meek's method instead redistributes every pile on
+    # each iteration, since keep factors change every candidate's share.
+    def run_stv(self, seats, method="gregory"):
+        self.rounds = []
+        self.elected = []
+        for candidate in self.by_id:
+            candidate.eliminated = False
+        if method == "gregory":
+            self._run_gregory(seats)
+        elif method == "meek":
+            self._run_meek(seats)
+        else:
+            raise ValueError(f"Unknown STV method: {method}")
+        return [candidate.name for candidate in self.elected]
+
+    def _record_round(self, votes, hopeful):
+        counts = array('d', [-1.0]) * len(self.by_id)
+        for candidate in self.by_id:
+            if hopeful[candidate.id] or candidate in self.elected:
+                counts[candidate.id] = round(votes[candidate.id], 6)
+        self.rounds.append(Round(counts, self.by_id))
+        return self.rounds[-1]
+
+    def _lowest(self, votes, hopeful):
+        continuing = [c for c in self.by_id if hopeful[c.id]]
+        fewest = min(votes[c.id] for c in continuing)
+        tied = [c for c in continuing if votes[c.id] == fewest]
+        if len(tied) == 1:
+            return tied[0]
+        return (self.tie_break or make_tie_break())(self, tied)
+
+    def _elect_remaining(self, votes, hopeful):
+        # As many seats left as continuing candidates: all of them are elected
+        round = self._record_round(votes, hopeful)
+        remaining = [c for c in self.by_id if hopeful[c.id]]
+        remaining.sort(key=lambda c: -votes[c.id])
+        self.elected.extend(remaining)
+        round.elected_candidate = ", ".join(c.name for c in remaining)
+
+    def _run_gregory(self, seats):
+        piles = self.ballots
+        weights = array('d', [1.0]) * len(piles)
+        pointers = array('L', [0]) * len(piles)
+        buckets = [[] for _ in self.by_id]
+        votes = array('d', [0.0]) * len(self.by_id)
+        hopeful = bytearray([1]) * len(self.by_id)
+
+        def assign(pile):
+            rankings = piles[pile].rankings
+            rank = pointers[pile]
+            while rank < len(rankings) and not hopeful[rankings[rank]]:
+                rank += 1
+            pointers[pile] = rank
+            if rank < len(rankings):
+                buckets[rankings[rank]].append(pile)
+                votes[rankings[rank]] += piles[pile].count * weights[pile]
+
+        def transfer(candidate, factor):
+            moving, buckets[candidate.id] = buckets[candidate.id], []
+            for pile in moving:
+                weights[pile] *= factor
+                pointers[pile] += 1
+                assign(pile)
+
+        for pile in range(len(piles)):
+            assign(pile)
+        quota = droop_quota(self.ballot_count(), seats)
+
+        while len(self.elected) < seats:
+            continuing = sum(hopeful)
+            if not continuing:
+                break
+            if len(self.elected) + continuing <= seats:
+                self._elect_remaining(votes, hopeful)
+                break
+            round = self._record_round(votes, hopeful)
+            reached = [c for c in self.by_id if hopeful[c.id] and votes[c.id] >= quota]
+            if reached:
+                reached.sort(key=lambda c: -votes[c.id])
+                reached = reached[:seats - len(self.elected)]
+                for candidate in reached:
+                    hopeful[candidate.id] = 0
+                    self.elected.append(candidate)
+                for candidate in reached:
+                    total = votes[candidate.id]
+                    votes[candidate.id] = quota
+                    transfer(candidate, (total - quota) / total)
+                round.elected_candidate = ", ".join(c.name for c in reached)
+            else:
+                loser = self._lowest(votes, hopeful)
+                hopeful[loser.id] = 0
+                loser.eliminated = True
+                votes[loser.id] = 0.0
+                transfer(loser, 1.0)
+                round.eliminated_candidate = loser.name
+
+    def _meek_distribute(self, keep):
+        votes = array('d', [0.0]) * len(self.by_id)
+        exhausted = 0.0
+        for ballot in self.ballots:
+            remaining = 1.0
+            for choice in ballot.rankings:
+                share = remaining * keep[choice]
+                votes[choice] += ballot.count * share
+                remaining -= share
+                if remaining <= 0.0:
+                    break
+            exhausted += ballot.count * remaining
+        return votes, exhausted
+
+    def _run_meek(self, seats):
+        keep = array('d', [1.0]) * len(self.by_id)
+        hopeful = bytearray([1]) * len(self.by_id)
+        total = self.ballot_count()
+
+        while len(self.elected) < seats:
+            continuing = sum(hopeful)
+            if not continuing:
+                break
+            for _ in range(MEEK_MAX_ITERATIONS):
+                votes, exhausted = self._meek_distribute(keep)
+                quota = (total - exhausted) / (seats + 1)
+                converged = True
+                for candidate in self.elected:
+                    if abs(votes[candidate.id] - quota) > MEEK_TOLERANCE * max(quota, 1.0):
+                        converged = False
+                    keep[candidate.id] *= quota / votes[candidate.id]
+                if converged:
+                    break
+            if len(self.elected) + continuing <= seats:
+                self._elect_remaining(votes, hopeful)
+                break
+            round = self._record_round(votes, hopeful)
+            reached = [c for c in self.by_id if hopeful[c.id] and votes[c.id] > quota]
+            if reached:
+                reached.sort(key=lambda c: -votes[c.id])
+                reached = reached[:seats - len(self.elected)]
+                for candidate in reached:
+                    hopeful[candidate.id] = 0
+                    self.elected.append(candidate)
+                round.elected_candidate = ", ".join(c.name for c in reached)
+            else:
+                loser = self._lowest(votes, hopeful)
+                hopeful[loser.id] = 0
+                loser.eliminated = True
+                keep[loser.id] = 0.0
+                round.eliminated_candidate = loser.name
+
+__all__ = ['STVElection', 'droop_quota']
@@ -0,0 +1,75 @@
+import json
+import multiprocessing
+from collections import Counter
+from ranked_choice_voting import Candidate, Election
+
+class BallotSummary:
+    # Mergeable count of identical rankings. A precinct builds one from its
+    # own ballots and ships it to a central node, which merges the summaries
+    # and tabulates without ever seeing individual ballots.
+    def __init__(self, candidates, piles=None):
+        self.candidates = list(candidates)
+        self.piles = Counter(piles or {})
+
+    @classmethod
+    def from_election(cls, election):
+        summary = cls(election.candidates)
+        for ballot in election.ballots:
+            summary.piles[tuple(ballot.names(election.by_id))] += ballot.count
+        return summary
+
+    def add_ballot(self, rankings, count=1):
+        self.piles[tuple(rankings)] += count
+
+    def ballot_count(self):
+        return sum(self.piles.values())
+
+    def merge(self, other):
+        known = set(self.candidates)
+        self.candidates.extend(name for name in other.candidates if name not in known)
+        self.piles.update(other.piles)
+        return self
+
+    def to_election(self, election_class=Election):
+        election = election_class([Candidate(name) for name in self.candidates])
+        election.warn_incomplete_ballots = False
+        for rankings, count in self.piles.items():
+            election.add_ballot(list(rankings), count)
+        return election
+
+    def to_dict(self):
+        index = {name: i for i, name in enumerate(self.candidates)}
+        return {
+            "candidates": self.candidates,
+            "piles": [[[index[name] for name in rankings], count]
+                      for rankings, count in self.piles.items()],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        names = data["candidates"]
+        return cls(names, {tuple(names[i] for i in ranking): count for ranking, count in data["piles"]})
+
+    def dumps(self):
+        return json.dumps(self.to_dict(), separators=(",", ":"))
+
+    @classmethod
+    def loads(cls, text):
+        return cls.from_dict(json.loads(text))
+
+def summarize_file(filename):
+    from ranked_choice_voting_stream import stream_election
+    return BallotSummary.from_election(stream_election(filename)).dumps()
+
+def summarize_files(filenames, processes=None):
+    # Local stand-in for precinct nodes: each file is summarized in its own
+    # worker and only the serialized summaries come back to be merged.
+    with multiprocessing.get_context().Pool(processes) as pool:
+        summaries = pool.map(summarize_file, filenames)
+    merged = None
+    for text in summaries:
+        summary = BallotSummary.loads(text)
+        merged = summary if merged is None else merged.merge(summary)
+    return merged
+
+__all__ = ['BallotSummary', 'summarize_file', 'summarize_files']
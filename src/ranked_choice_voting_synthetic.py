@@ -0,0 +1,63 @@
+import math
+import random
+from collections import Counter
+from ranked_choice_voting import Candidate, Election
+
+# Seeded synthetic electorates for benchmarks and tests. Every generator
+# yields rankings of candidate names, one per voter.
+
+def candidate_names(count):
+    return [f"Candidate {i + 1}" for i in range(count)]
+
+def _truncate(rng, ranking, truncation):
+    # With probability `truncation` the voter stops after a random number of choices
+    if truncation and len(ranking) > 1 and rng.random() < truncation:
+        return ranking[:rng.randint(1, len(ranking) - 1)]
+    return ranking
+
+def spatial_electorate(candidates, voters, seed=0, dimensions=2, clusters=3, truncation=0.0):
+    # Candidates and voter cluster centres sit in a unit cube; each voter
+    # ranks the candidates by distance from their own position.
+    rng = random.Random(seed)
+    positions = [[rng.random() for _ in range(dimensions)] for _ in candidates]
+    centres = [[rng.random() for _ in range(dimensions)] for _ in range(clusters)]
+    for _ in range(voters):
+        centre = rng.choice(centres)
+        voter = [rng.gauss(x, 0.2) for x in centre]
+        distances = [math.dist(voter, position) for position in positions]
+        order = sorted(range(len(candidates)), key=distances.__getitem__)
+        yield _truncate(rng, [candidates[i] for i in order], truncation)
+
+def plackett_luce_electorate(candidates, voters, seed=0, weights=None, truncation=0.0):
+    # Sampling by sorting log-weights perturbed with Gumbel noise is
+    # equivalent to drawing choices one at a time in proportion to weight.
+    rng = random.Random(seed)
+    if weights is None:
+        weights = [rng.gammavariate(1.0, 1.0) for _ in candidates]
+    log_weights = [math.log(w) for w in weights]
+    for _ in range(voters):
+        keys = [w - math.log(-math.log(rng.random() or 1e-300)) for w in log_weights]
+        order = sorted(range(len(candidates)), key=keys.__getitem__, reverse=True)
+        yield _truncate(rng, [candidates[i] for i in order], truncation)
+
+MODELS = {
+    "spatial": spatial_electorate,
+    "plackett-luce": plackett_luce_electorate,
+}
+
+def generate_election(candidate_count, voters, model="plackett-luce", seed=0, truncation=0.0,
+                      election_class=Election, chunk_size=100000):
+    names = candidate_names(candidate_count)
+    election = election_class([Candidate(name) for name in names])
+    election.warn_incomplete_ballots = False
+    rankings = MODELS[model](names, voters, seed=seed, truncation=truncation)
+    # Rankings are tallied in chunks so large electorates never exist as a list
+    while True:
+        chunk = Counter(tuple(ranking) for _, ranking in zip(range(chunk_size), rankings))
+        if not chunk:
+            return election
+        for ranking, count in chunk.items():
+            election.add_ballot(ranking, count)
+
+__all__ = ['MODELS', 'candidate_names', 'generate_election',
+           'plackett_luce_electorate', 'spatial_electorate']
@@ -0,0 +1,129 @@
+from array import array
+from ranked_choice_voting import Candidate, Election
+
+class _Tally:
+    __slots__ = ('totals', 'buckets')
+
+    # buckets[i] lists (pile, position) for every pile currently counting for
+    # candidate i. Lists are shared with the parent tally until they change.
+    def __init__(self, totals, buckets):
+        self.totals = totals
+        self.buckets = buckets
+
+class WhatIfAnalysis:
+    # Answers "who wins if these candidates withdraw?" from a snapshot of an
+    # election's ballot piles. Withdrawn and eliminated candidates affect the
+    # tally the same way, so tallies are cached by the set of removed
+    # candidates and scenarios that pass through the same elimination state
+    # share it instead of recounting.
+    def __init__(self, election):
+        self.names = [candidate.name for candidate in election.by_id]
+        self._ids = {name: i for i, name in enumerate(self.names)}
+        self.rankings = [ballot.rankings for ballot in election.ballots]
+        self.counts = [ballot.count for ballot in election.ballots]
+        # Scenarios are counted under the election's own rules
+        self.tie_break = election.tie_break
+        self.bulk_elimination = election.bulk_elimination
+        self.hits = 0
+        self.misses = 0
+        totals = array('q', [0]) * len(self.names)
+        buckets = [[] for _ in self.names]
+        for pile, ranking in enumerate(self.rankings):
+            if ranking:
+                buckets[ranking[0]].append((pile, 0))
+                totals[ranking[0]] += self.counts[pile]
+        self._tallies = {frozenset(): _Tally(totals, buckets)}
+
+    def tally(self, removed, parent=frozenset()):
+        tally = self._tallies.get(removed)
+        if tally is not None:
+            self.hits += 1
+            return tally
+        self.misses += 1
+        base = self._tallies[parent]
+        totals = array('q', base.totals)
+        buckets = list(base.buckets)
+        copied = set()
+        for candidate in removed - parent:
+            moving, buckets[candidate] = buckets[candidate], []
+            totals[candidate] = 0
+            for pile, position in moving:
+                ranking = self.rankings[pile]
+                position += 1
+                while position < len(ranking) and ranking[position] in removed:
+                    position += 1
+                if position < len(ranking):
+                    receiver = ranking[position]
+                    if receiver not in copied:
+                        buckets[receiver] = list(buckets[receiver])
+                        copied.add(receiver)
+                    buckets[receiver].append((pile, position))
+                    totals[receiver] += self.counts[pile]
+        tally = self._tallies[removed] = _Tally(totals, buckets)
+        return tally
+
+    def outcome(self, excluded=()):
+        try:
+            excluded_ids = frozenset(self._ids[name] for name in excluded)
+        except KeyError as e:
+            raise ValueError(f"Invalid candidate: {e.args[0]}")
+        election = _ScenarioElection(self, excluded_ids)
+        winner = election.run_election()
+        return winner, election.rounds
+
+    def withdrawal_sweep(self):
+        return {name: self.outcome([name])[0] for name in self.names}
+
+    def clear(self):
+        root = self._tallies[frozenset()]
+        self._tallies = {frozenset(): root}
+
+class _ScenarioElection(Election):
+    # The election as it would have run without the excluded candidates:
+    # rounds only list the remaining candidates, and counts come from the
+    # analysis' cached tallies.
+    def __init__(self, analysis, excluded_ids):
+        self._analysis = analysis
+        self._excluded = excluded_ids
+        self._original_ids = [i for i in range(len(analysis.names)) if i not in excluded_ids]
+        super().__init__([Candidate(analysis.names[i]) for i in self._original_ids])
+        self.tie_break = analysis.tie_break
+        self.bulk_elimination = analysis.bulk_elimination
+
+    def start_count(self):
+        self.rounds = []
+        for candidate in self.by_id:
+            candidate.eliminated = False
+        self._removed = self._excluded
+        self._counted = frozenset()
+        # First choices with the excluded candidates struck out, for tie-break rules
+        totals = self._analysis.tally(self._excluded).totals
+        for candidate in self.by_id:
+            self.first_choice_counts[candidate.id] = totals[self._original_ids[candidate.id]]
+
+    def count_votes(self):
+        tally = self._analysis.tally(self._removed, self._counted)
+        self._counted = self._removed
+        return {candidate: tally.totals[self._original_ids[candidate.id]]
+                for candidate in self.by_id if not candidate.eliminated}
+
+    def eliminate_candidate(self, candidate):
+        candidate.eliminated = True
+        self._removed = self._removed | {self._original_ids[candidate.id]}
+
+    def count_next_choice_votes(self, candidates_to_check):
+        # Same rule as Election: the first continuing candidate after the
+        # ballot's first choice, with the excluded candidates struck out.
+        allowed = {self._original_ids[c.id]: c for c in candidates_to_check if not c.eliminated}
+        next_choice_counts = {}
+        for ranking, count in zip(self._analysis.rankings, self._analysis.counts):
+            choices = (i for i in ranking if i not in self._excluded)
+            next(choices, None)
+            for choice in choices:
+                if choice in allowed:
+                    candidate = allowed[choice]
+                    next_choice_counts[candidate] = next_choice_counts.get(candidate, 0) + count
+                    break
+        return next_choice_counts
+
+__all__ = ['WhatIfAnalysis']
@@ -1,5 +1,6 @@
 import pytest
-from ranked_choice_voting import Candidate, Election, InvalidBallotException
+from ranked_choice_voting import (Candidate, Election, InvalidBallotException, drawn_by_lot,
+                                  first_choices, make_tie_break, previous_rounds)
 
 def run_election(candidates, ballots):
     election = Election([Candidate(name) for name in candidates])
@@ -110,3 +111,142 @@ def test_no_valid_ballots():
     election = Election([Candidate("Alice"), Candidate("Bob")])
     result = election.run_election()
     assert result == "No winner"
+
+def test_identical_ballots_share_a_pile():
+    election = Election([Candidate("Alice"), Candidate("Bob")])
+    election.add_ballot(["Alice", "Bob"])
+    election.add_ballot(["Bob", "Alice"])
+    election.add_ballot(["Alice", "Bob"], count=3)
+    assert len(election.ballots) == 2
+    assert election.ballot_count() == 5
+    assert election.run_election() == "Alice"
+    assert {c.name: v for c, v in election.rounds[0].vote_counts.items()} == {"Alice": 4, "Bob": 1}
+
+def test_ballot_count_must_be_positive_integer():
+    election = Election([Candidate("Alice"), Candidate("Bob")])
+    for count in (-5, 0, 1.5, True, "2"):
+        with pytest.raises(InvalidBallotException, match="positive integer"):
+            election.add_ballot(["Alice", "Bob"], count)
+    assert election.ballot_count() == 0
+
+def test_set_pile_counts_recounts_the_same_rankings():
+    election = Election([Candidate("Alice"), Candidate("Bob")])
+    election.add_ballot(["Alice", "Bob"], count=3)
+    election.add_ballot(["Bob", "Alice"], count=2)
+    election.set_pile_counts([0, 4])
+    assert election.ballot_count() == 4
+    assert election.run_election() == "Bob"
+    # An emptied pile rejoins the count when ballots are added to it
+    election.add_ballot(["Alice", "Bob"], count=5)
+    assert election.ballot_count() == 9
+    assert election.run_election() == "Alice"
+
+def test_elimination_only_moves_eliminated_ballots():
+    election = Election([Candidate("Alice"), Candidate("Bob"), Candidate("Charlie")])
+    election.add_ballot(["Alice", "Bob", "Charlie"], count=2)
+    election.add_ballot(["Bob", "Alice", "Charlie"], count=2)
+    election.add_ballot(["Charlie", "Bob", "Alice"])
+    counts = election.count_votes()
+    assert [counts[c] for c in election.candidates.values()] == [2, 2, 1]
+    election.eliminate_candidate(election.candidates["Charlie"])
+    assert election.count_votes() == {election.candidates["Alice"]: 2, election.candidates["Bob"]: 3}
+    alice_pile, bob_pile, charlie_pile = election.ballots
+    assert (alice_pile.current_rank, bob_pile.current_rank, charlie_pile.current_rank) == (1, 1, 2)
+
+def test_validate_ballots_reports_without_printing(capsys):
+    election = Election([Candidate("Alice"), Candidate("Bob"), Candidate("Charlie")])
+    report = election.validate_ballots([
+        ["Alice", "Bob", "Charlie"],
+        [],
+        ["Alice", "Alice", "Bob"],
+        ["Alice", "Dave", "Bob"],
+        ["Bob", "Alice"],
+        ["Alice", "Dave", "Bob"],
+    ])
+    assert capsys.readouterr().out == ""
+    assert report.total == 6
+    assert report.counts() == {"empty": 1, "duplicate": 1, "invalid_candidate": 2, "incomplete": 1}
+    assert list(report.indices["invalid_candidate"]) == [3, 5]
+    assert report.invalid_indices() == [1, 2, 3, 5]
+    assert not report.is_valid()
+
+def test_compact_ids_and_round_arrays():
+    election = Election([Candidate("Alice"), Candidate("Bob"), Candidate("Charlie")])
+    election.add_ballot(["Charlie", "Alice", "Bob"])
+    election.add_ballot(["Bob", "Alice", "Charlie"], count=2)
+    election.add_ballot(["Alice", "Bob", "Charlie"], count=2)
+    assert [c.id for c in election.by_id] == [0, 1, 2]
+    ballot = election.ballots[0]
+    assert not hasattr(ballot, "__dict__")
+    assert ballot.rankings.typecode == "H" and list(ballot.rankings) == [2, 0, 1]
+    assert ballot.names(election.by_id) == ["Charlie", "Alice", "Bob"]
+    assert election.run_election() == "Alice"
+    first, second = election.rounds
+    assert list(first.counts) == [2, 2, 1]
+    assert list(second.counts) == [3, 2, -1]
+    assert {c.name: v for c, v in second.vote_counts.items()} == {"Alice": 3, "Bob": 2}
+
+def test_round_stats_and_observers():
+    election = Election([Candidate("Alice"), Candidate("Bob"), Candidate("Charlie")])
+    election.add_ballot(["Alice", "Bob", "Charlie"], count=3)
+    election.add_ballot(["Bob", "Alice", "Charlie"], count=3)
+    election.add_ballot(["Charlie", "Bob"], count=2)
+    seen = []
+    election.add_observer(lambda e, r: seen.append(r))
+    election.run_election()
+    assert seen == election.rounds and all(r.stats is None for r in seen)
+
+    election.collect_stats = election.trace_memory = True
+    assert election.run_election() == "Bob"
+    first, second = (r.stats for r in election.rounds)
+    assert (first.ballots_touched, first.piles_touched, first.ballots_exhausted) == (10, 4, 0)
+    assert (second.ballots_touched, second.piles_touched) == (0, 0)
+    assert set(first.phases) == {"count", "eliminate"} and first.wall_time >= sum(first.phases.values())
+    assert first.peak_memory is not None and second.allocated is not None
+
+def test_live_batches_update_first_choices_and_report_order_changes(capsys):
+    election = Election([Candidate("Alice"), Candidate("Bob"), Candidate("Charlie")])
+    report = election.add_ballots([["Alice", "Bob"]] * 4 + [["Bob", "Alice"]] * 3 +
+                                  [["Charlie", "Alice"]] * 2 + [["Dave"], []])
+    assert capsys.readouterr().out == ""
+    assert report.invalid_indices() == [9, 10]
+    assert list(election.first_choice_counts) == [4, 3, 2]
+    assert election.republish() == ("Alice", False)
+    assert election.elimination_order() == ["Charlie"]
+
+    election.add_ballots([["Charlie", "Bob"]] * 3)
+    assert list(election.first_choice_counts) == [4, 3, 5]
+    assert election.ballot_count() == 12
+    assert election.republish() == ("Alice", True)
+    assert election.elimination_order() == ["Bob"]
+
+def test_bulk_elimination_defeats_trailing_candidates_together():
+    candidates = ["A", "B", "C", "D", "E", "F"]
+    ballots = {("A", "B"): 40, ("B", "A"): 35, ("C", "B"): 10, ("D", "C"): 6, ("E", "D"): 3, ("F", "A"): 1}
+    results = []
+    for bulk in (False, True):
+        election = Election([Candidate(name) for name in candidates])
+        election.warn_incomplete_ballots = False
+        election.bulk_elimination = bulk
+        for ranking, count in ballots.items():
+            election.add_ballot(ranking, count)
+        results.append((election.run_election(), election.elimination_order()))
+    assert results[0] == ("B", ["F", "E", "D", "C"])
+    assert results[1] == ("B", ["C, D, E, F"])
+
+def test_tie_break_rules():
+    def run(tie_break):
+        election = Election([Candidate(name) for name in ["A", "B", "D", "C", "E"]])
+        election.warn_incomplete_ballots = False
+        election.tie_break = tie_break
+        for ranking, count in {("A",): 10, ("B",): 6, ("C", "B"): 4, ("D", "A"): 3, ("E", "D"): 1}.items():
+            election.add_ballot(ranking, count)
+        election.run_election()
+        return election.elimination_order()
+
+    # Round 2 ties C and D at 4 votes; D had fewer in round 1
+    assert run(None) == ["E", "D, C"]
+    assert run(make_tie_break()) == ["E", "C", "D"]
+    assert run(make_tie_break(previous_rounds)) == ["E", "D"]
+    assert run(make_tie_break(first_choices)) == ["E", "D"]
+    assert run(make_tie_break(drawn_by_lot(1))) == run(make_tie_break(drawn_by_lot(1)))
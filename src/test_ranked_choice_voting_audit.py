@@ -0,0 +1,75 @@
+import pickle
+import random
+import ranked_choice_voting_audit
+from ranked_choice_voting import Candidate, Election, drawn_by_lot, first_choices, make_tie_break
+from ranked_choice_voting_audit import BallotStore, run_audit
+from ranked_choice_voting_synthetic import generate_election
+
+def test_tabulate_matches_run_election():
+    for seed in range(5):
+        election = generate_election(6, 2000, seed=seed, truncation=0.4)
+        store = BallotStore.from_election(election)
+        counts = store.resample(random.Random(seed))
+        assert sum(counts) == store.total
+
+        fresh = Election([Candidate(name) for name in store.names])
+        fresh.warn_incomplete_ballots = False
+        for ranking, count in zip(store.rankings, counts):
+            if count:
+                fresh.add_ballot([store.names[i] for i in ranking], count)
+        winner, order, _, _ = store.tabulate(counts)
+        assert winner == fresh.run_election()
+        assert order == fresh.elimination_order()
+
+def test_landslide_is_stable():
+    election = Election([Candidate(name) for name in ("A", "B", "C")])
+    election.add_ballot(["A", "B", "C"], 70)
+    election.add_ballot(["B", "C", "A"], 20)
+    election.add_ballot(["C", "B", "A"], 10)
+    report = run_audit(election, samples=40, processes=1)
+    assert report.reported_winner == "A"
+    assert report.stability() == 1.0
+    assert report.margin_summary()["min"] > 0
+    assert report.to_dict()["samples"] == 40
+
+def test_results_do_not_depend_on_process_count():
+    election = generate_election(5, 500, seed=3, truncation=0.2)
+    serial = run_audit(election, samples=30, seed=7, processes=1, chunk_size=10)
+    pooled = run_audit(election, samples=30, seed=7, processes=2, chunk_size=10)
+    assert serial.to_dict() == pooled.to_dict()
+
+def test_resample_without_numpy(monkeypatch):
+    monkeypatch.setattr(ranked_choice_voting_audit, "_numpy", lambda: None)
+    store = BallotStore(["A", "B"], [[0], [1], [0, 1]], [6000, 3000, 1000])
+    totals = [0, 0, 0]
+    for seed in range(20):
+        counts = store.resample(random.Random(seed))
+        assert sum(counts) == store.total
+        totals = [t + c for t, c in zip(totals, counts)]
+    assert [round(t / 20 / 1000) for t in totals] == [6, 3, 1]
+    assert sum(store.resample(random.Random(0), size=7)) == 7
+    # Piles this size would take minutes drawn one success at a time
+    large = BallotStore(["A", "B"], [[0], [1]], [60_000_000, 40_000_000])
+    counts = large.resample(random.Random(1))
+    assert sum(counts) == large.total and abs(counts[0] - 60_000_000) < 50_000
+
+def test_audit_follows_election_rules():
+    election = Election([Candidate(name) for name in ("A", "B", "C")])
+    election.warn_incomplete_ballots = False
+    election.add_ballot(["A"], 3)
+    election.add_ballot(["B", "C"], 2)
+    election.add_ballot(["C", "B"], 2)
+    # Eliminating only C lets B overtake A
+    election.tie_break = make_tie_break()
+    report = run_audit(election, samples=5, processes=1)
+    assert report.reported_winner == "B"
+
+def test_pooled_audit_with_tie_break():
+    election = generate_election(5, 400, seed=2, truncation=0.3)
+    election.tie_break = make_tie_break(first_choices, drawn_by_lot(5))
+    # Workers started by spawn or forkserver receive the store pickled
+    store = pickle.loads(pickle.dumps(BallotStore.from_election(election)))
+    assert store.tabulate(store.counts) == BallotStore.from_election(election).tabulate(store.counts)
+    serial = run_audit(election, samples=20, seed=1, processes=1, chunk_size=5)
+    pooled = run_audit(election, samples=20, seed=1, processes=2, chunk_size=5)
+    assert serial.to_dict() == pooled.to_dict()
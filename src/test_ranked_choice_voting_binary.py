@@ -0,0 +1,65 @@
+import struct
+from pathlib import Path
+import pytest
+from ranked_choice_voting import Candidate, Election
+from ranked_choice_voting_binary import (HEADER, BinaryElectionFile, InvalidElectionFile,
+                                         load_election_binary, save_election_binary)
+from ranked_choice_voting_stream import stream_election
+
+def piles(election):
+    return {tuple(ballot.names(election.by_id)): ballot.count for ballot in election.ballots}
+
+def test_round_trip(tmp_path):
+    election = stream_election(str(Path(__file__).with_name("dilbert_election.json")))
+    election.add_ballot(["Wally"], count=70000)
+    path = str(tmp_path / "election.rcvb")
+    save_election_binary(election, path)
+    loaded = load_election_binary(path)
+    assert list(loaded.candidates) == list(election.candidates)
+    assert piles(loaded) == piles(election)
+    assert loaded.run_election() == election.run_election()
+
+def test_mapped_arrays(tmp_path):
+    election = Election([Candidate("Zoë"), Candidate("Bob")])
+    election.add_ballot(["Bob", "Zoë"], count=2)
+    election.add_ballot(["Zoë"])
+    path = str(tmp_path / "election.rcvb")
+    save_election_binary(election, path)
+    with BinaryElectionFile(path) as data:
+        assert data.candidates == ["Zoë", "Bob"]
+        assert list(data.counts) == [2, 1]
+        assert list(data.offsets) == [0, 2, 3]
+        assert list(data.ranking(0)) == [1, 0]
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "election.rcvb"
+    path.write_bytes(b'{"candidates": [], "ballots": []}')
+    with pytest.raises(InvalidElectionFile):
+        load_election_binary(str(path))
+
+def test_rejects_damaged_files(tmp_path):
+    election = Election([Candidate("Alice"), Candidate("Bob")])
+    election.add_ballot(["Alice", "Bob"], count=2)
+    election.add_ballot(["Bob"])
+    path = tmp_path / "election.rcvb"
+    save_election_binary(election, str(path))
+    data = path.read_bytes()
+
+    # The file ends with 3 u64 offsets, 2 u32 counts and 3 u16 candidate IDs
+    ids = len(data) - 3 * 2
+    counts = ids - 2 * 4
+    last_offset = counts - 8
+    damaged = {
+        "candidate": data[:-2] + struct.pack("<H", 7),
+        "offsets": data[:last_offset] + struct.pack("<Q", 9) + data[counts:],
+        "count": data[:counts] + struct.pack("<I", 0) + data[counts + 4:],
+        # More candidates than the table holds, and a name cut short
+        "candidate table": HEADER.pack(b"RCVB", 1, 2, 0, 0) + b"\x02\x00ab",
+        "candidate name": HEADER.pack(b"RCVB", 1, 50, 0, 0) + b"\x05\x00ab",
+    }
+    messages = {"count": "no ballots", "candidate table": "truncated candidate table",
+                "candidate name": "truncated candidate table"}
+    for name, content in damaged.items():
+        path.write_bytes(content)
+        with pytest.raises(InvalidElectionFile, match=messages.get(name, name)):
+            load_election_binary(str(path))
@@ -0,0 +1,66 @@
+import json
+from array import array
+from ranked_choice_voting import Candidate, Election
+from ranked_choice_voting_cache import ResultsCache, election_key
+from ranked_choice_voting_stream import stream_election
+
+def build(ballots):
+    election = Election([Candidate(name) for name in ("Alice", "Bob", "Charlie")])
+    election.warn_incomplete_ballots = False
+    for ballot in ballots:
+        election.add_ballot(ballot)
+    return election
+
+BALLOTS = [["Alice", "Bob"], ["Bob", "Alice"], ["Charlie", "Bob"], ["Bob"], ["Alice"]]
+
+def test_key_ignores_ballot_order():
+    assert election_key(build(BALLOTS)) == election_key(build(BALLOTS[::-1]))
+    assert election_key(build(BALLOTS)) != election_key(build(BALLOTS[1:]))
+
+def test_tabulate_reuses_rounds(tmp_path):
+    cache = ResultsCache(str(tmp_path))
+    expected = build(BALLOTS)
+    winner = expected.run_election()
+
+    assert cache.tabulate(build(BALLOTS)) == winner
+    election = build(BALLOTS[::-1])
+    seen = []
+    election.add_observer(lambda election, round: seen.append(round))
+    assert cache.tabulate(election) == winner
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert len(seen) == len(expected.rounds)
+    assert [list(r.counts) for r in election.rounds] == [list(r.counts) for r in expected.rounds]
+    assert election.elimination_order() == expected.elimination_order()
+
+def test_open_skips_parsing_unchanged_file(tmp_path):
+    filename = tmp_path / "election.json"
+    filename.write_text(json.dumps({"candidates": ["Alice", "Bob", "Charlie"], "ballots": BALLOTS}))
+    cache = ResultsCache(str(tmp_path / "cache"))
+    loads = []
+
+    def load(name):
+        loads.append(name)
+        return stream_election(name)
+
+    first = cache.open(str(filename), load)
+    winner = cache.tabulate(first)
+    second = cache.open(str(filename), load)
+    assert len(loads) == 1
+    assert second.rounds and cache.tabulate(second) == winner
+
+def test_restores_tied_eliminations(tmp_path):
+    # Bob and Charlie go out together under one "Bob, Charlie" label
+    ballots = [["Alice", "Bob"], ["Alice"], ["Bob", "Charlie"], ["Charlie", "Alice"]]
+    cache = ResultsCache(str(tmp_path))
+    assert cache.tabulate(build(ballots)) == "Alice"
+    for _ in range(2):
+        election = build(ballots)
+        assert cache.tabulate(election) == "Alice"
+        assert [c.name for c in election.by_id if c.eliminated] == ["Bob", "Charlie"]
+        assert election.rounds[0].transfers == {1: array('q', [0, 0, 0, 1]), 2: array('q', [1, 0, 0, 0])}
+    assert cache.hits == 2
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = ResultsCache(str(tmp_path), max_bytes=0)
+    cache.tabulate(build(BALLOTS))
+    assert cache.size() == 0
@@ -0,0 +1,28 @@
+import json
+from ranked_choice_voting_cli import batch_main
+
+def test_batch_writes_one_result_per_contest(tmp_path):
+    good = tmp_path / "good.json"
+    good.write_text(json.dumps({"candidates": ["X", "Y"], "ballots": [["X"], ["Z"], ["Y", "X"], ["X", "Y"]]}))
+    output = tmp_path / "results.jsonl"
+    status = batch_main([str(good), str(tmp_path / "missing.json"), "--processes", "1", "--output", str(output)])
+    first, second = [json.loads(line) for line in output.read_text().splitlines()]
+    assert status == 1
+    assert first["winner"] == "X"
+    assert first["ballots"] == 3 and first["invalid_ballots"] == 1
+    assert first["rounds"][0]["votes"] == {"X": 2, "Y": 1}
+    assert second["file"].endswith("missing.json") and "FileNotFoundError" in second["error"]
+
+def test_batch_reports_any_error_and_keeps_going(tmp_path):
+    broken = tmp_path / "broken.jsonl"
+    broken.write_text('{"candidates": ["X", "Y"]}\n{"ranking": ["X"]}\n{"count": 2}\n')
+    damaged = tmp_path / "damaged.rcvb"
+    damaged.write_bytes(b"not a binary election")
+    good = tmp_path / "good.json"
+    good.write_text(json.dumps({"candidates": ["X", "Y"], "ballots": [["X"], ["Y", "X"], ["X"]]}))
+    output = tmp_path / "results.jsonl"
+    status = batch_main([str(broken), str(damaged), str(good), "--processes", "2", "--output", str(output)])
+    results = [json.loads(line) for line in output.read_text().splitlines()]
+    assert status == 1
+    assert "error" in results[0] and "error" in results[1]
+    assert results[2]["winner"] == "X"
@@ -0,0 +1,64 @@
+import json
+from ranked_choice_voting_cvr import import_cvr
+
+CSV = """BallotID,Precinct,Rank 1,Rank 2,Rank 3
+1,P1,Alice,Bob,Charlie
+2,P1,Alice,Bob,Charlie
+3,P1,undervote,Bob,Alice
+4,P2,overvote,Bob,
+5,P2,Charlie,overvote,Alice
+6,P2,Bob,Bob,Alice
+7,P2,,,
+"""
+
+def write_csv(tmp_path, name="cvr.csv", text=CSV):
+    path = tmp_path / name
+    path.write_text(text)
+    return str(path)
+
+def piles(election):
+    return {tuple(ballot.names(election.by_id)): ballot.count for ballot in election.ballots}
+
+def test_csv_rank_columns(tmp_path):
+    election, report = import_cvr([write_csv(tmp_path)], processes=1)
+    assert [c.name for c in election.by_id] == ["Alice", "Bob", "Charlie"]
+    assert piles(election) == {("Alice", "Bob", "Charlie"): 2, ("Bob", "Alice"): 2, ("Charlie",): 1}
+    counts = report.to_dict()
+    assert counts["ballots"] == 7
+    assert counts["counted"] == 5
+    assert counts["blank"] == 1
+    assert counts["overvote"] == 2
+    assert counts["exhausted_by_overvote"] == 1
+    assert counts["duplicate"] == 1
+
+def test_overvote_skip_and_skip_limit(tmp_path):
+    election, _ = import_cvr([write_csv(tmp_path)], overvote="skip", processes=1)
+    assert piles(election)[("Charlie", "Alice")] == 1
+    assert piles(election)[("Bob",)] == 1
+
+    text = "Rank 1,Rank 2,Rank 3,Rank 4\nAlice,,,Bob\nAlice,,Bob,\n"
+    election, report = import_cvr([write_csv(tmp_path, text=text)], max_skipped=1, processes=1)
+    assert piles(election) == {("Alice",): 1, ("Alice", "Bob"): 1}
+    assert report.counts["exhausted_by_skips"] == 1
+    assert report.counts["skipped_ranking"] == 1
+
+def test_json_cvr_across_files(tmp_path):
+    def session(*marks):
+        return {"Original": {"Cards": [{"Contests": [{"Id": 7, "Marks": [
+            {"CandidateId": candidate, "Rank": rank, "IsAmbiguous": False, "IsVote": True}
+            for candidate, rank in marks]}]}]}}
+
+    names = {"1": "Alice", "2": "Bob"}
+    first = tmp_path / "cvr1.json"
+    first.write_text(json.dumps({"Sessions": [session((1, 1), (2, 2)), session((2, 1))]}))
+    second = tmp_path / "cvr2.json"
+    second.write_text(json.dumps({"Sessions": [session((1, 1), (2, 1)), session((2, 1), (1, 3))]}))
+    files = [str(first), str(second)]
+
+    election, report = import_cvr(files, contest=7, candidate_names=names, processes=2)
+    assert report.files == 2
+    assert piles(election) == {("Alice", "Bob"): 1, ("Bob",): 1, ("Bob", "Alice"): 1}
+    assert report.counts["overvote"] == 1
+    assert report.counts["skipped_ranking"] == 1
+    serial, _ = import_cvr(files, contest=7, candidate_names=names, processes=1)
+    assert piles(serial) == piles(election)
@@ -0,0 +1,45 @@
+import random
+from ranked_choice_voting import Candidate, Election
+from ranked_choice_voting_groups import GroupedElection
+
+NAMES = ["Alice", "Bob", "Charlie", "Dave", "Eve"]
+
+def random_ballots(seed, count=2000):
+    rng = random.Random(seed)
+    for _ in range(count):
+        ranking = rng.sample(NAMES, rng.randint(1, len(NAMES)))
+        yield ranking, (rng.choice(["P1", "P2", "P3"]), rng.choice(["mail", "in person"]))
+
+def test_groups_follow_global_count():
+    for seed in range(5):
+        grouped = GroupedElection([Candidate(name) for name in NAMES])
+        plain = Election([Candidate(name) for name in NAMES])
+        grouped.warn_incomplete_ballots = plain.warn_incomplete_ballots = False
+        for ranking, group in random_ballots(seed):
+            grouped.add_ballot(ranking, group=group)
+            plain.add_ballot(ranking)
+        assert grouped.run_election() == plain.run_election()
+        assert grouped.elimination_order() == plain.elimination_order()
+        assert len(grouped.group_counts) == len(grouped.rounds)
+        for i, round in enumerate(grouped.rounds):
+            summed = {}
+            for counts in grouped.group_table(i).values():
+                for name, votes in counts.items():
+                    summed[name] = summed.get(name, 0) + votes
+            assert summed == {c.name: v for c, v in round.vote_counts.items()}
+
+def test_rollup_and_group_history():
+    election = GroupedElection([Candidate(name) for name in ("Alice", "Bob", "Charlie")])
+    election.warn_incomplete_ballots = False
+    election.add_ballots([["Alice"], ["Alice"], ["Charlie", "Bob"]], group=("P1", "mail"))
+    election.add_ballot(["Bob"], 3, group=("P1", "in person"))
+    election.add_ballot(["Charlie", "Bob"], 1, group=("P2", "mail"))
+    election.add_ballot(["Alice"], 1, group=("P2", "mail"))
+    assert election.run_election() == "Bob"
+
+    by_precinct = election.group_table(0, key=lambda group: group[0])
+    assert by_precinct == {"P1": {"Alice": 2, "Bob": 3, "Charlie": 1}, "P2": {"Alice": 1, "Bob": 0, "Charlie": 1}}
+    assert election.group_table(1, key=lambda group: group[0])["P2"] == {"Alice": 1, "Bob": 1}
+    history = election.group_history(("P1", "mail"))
+    assert [history.vote_counts(i) for i in range(len(history))] == [{"Alice": 2, "Bob": 0, "Charlie": 1},
+                                                                     {"Alice": 2, "Bob": 1}]
@@ -0,0 +1,68 @@
+import csv
+from ranked_choice_voting import Candidate, Election
+from ranked_choice_voting_history import RoundHistory
+
+def build():
+    election = Election([Candidate(name) for name in ("Alice", "Bob", "Charlie", "Dave")])
+    election.warn_incomplete_ballots = False
+    election.add_ballot(["Alice", "Bob"], 6)
+    election.add_ballot(["Bob", "Alice"], 5)
+    election.add_ballot(["Charlie", "Bob"], 3)
+    election.add_ballot(["Dave"], 1)
+    election.add_ballot(["Dave", "Charlie"], 1)
+    election.run_election()
+    return election
+
+def test_matrix_matches_rounds():
+    election = build()
+    history = RoundHistory.from_election(election)
+    assert len(history) == len(election.rounds)
+    for i, round in enumerate(election.rounds):
+        assert history.vote_counts(i) == {c.name: v for c, v in round.vote_counts.items()}
+    assert list(history.column("Dave")) == [2, -1, -1]
+    assert history.max_votes == 8
+
+def test_history_is_cached_per_count():
+    election = build()
+    history = RoundHistory.of(election)
+    assert RoundHistory.of(election) is history
+    election.add_ballot(["Charlie"], 4)
+    streamed = []
+    election.add_observer(lambda election, round: streamed.append(RoundHistory.of(election)))
+    election.run_election()
+    # The recount starts a new history that grows round by round
+    assert streamed[0] is not history and all(h is streamed[0] for h in streamed)
+    fresh = RoundHistory.from_election(election)
+    assert list(streamed[0].counts) == list(fresh.counts)
+    assert streamed[0].outcomes == fresh.outcomes and streamed[0].max_votes == fresh.max_votes
+
+def test_transfers():
+    history = RoundHistory.from_election(build())
+    assert history.transfers(0) == {"Dave": -2, "Charlie": 1, "exhausted": 1}
+    assert history.transfer_matrix(1)["Charlie"] == [0, 3, 0, 0, 1]
+    assert history.transfers(len(history) - 1) is None
+
+def test_transfers_out_of_a_joint_elimination():
+    election = Election([Candidate(name) for name in "ABCDE"])
+    election.warn_incomplete_ballots = False
+    for ranking, count in ((["A"], 10), (["B", "D"], 2), (["C", "E"], 2), (["D"], 5), (["E"], 6)):
+        election.add_ballot(ranking, count)
+    election.run_election()
+    assert election.rounds[0].eliminated_candidate == "B, C"
+    history = RoundHistory.from_election(election)
+    assert history.transfer_matrix(0) == {"B": [0, 0, 0, 2, 0, 0], "C": [0, 0, 0, 0, 2, 0]}
+    # Without recorded transfers the sources share one row rather than a guessed split
+    history.recorded = [None] * len(history)
+    assert history.transfer_matrix(0) == {"B, C": [0, 0, 0, 2, 2, 0]}
+
+def test_csv_export(tmp_path):
+    history = RoundHistory.from_election(build())
+    history.write_csv(tmp_path / "rounds.csv")
+    with open(tmp_path / "rounds.csv") as f:
+        rows = list(csv.DictReader(f))
+    assert [row["Alice"] for row in rows] == ["6", "6", "6"]
+    assert rows[0]["eliminated"] == "Dave"
+    history.write_transfers_csv(tmp_path / "transfers.csv")
+    with open(tmp_path / "transfers.csv") as f:
+        assert list(csv.reader(f))[1:] == [["1", "Dave", "Charlie", "1"], ["1", "Dave", "exhausted", "1"],
+                                           ["2", "Charlie", "Bob", "3"], ["2", "Charlie", "exhausted", "1"]]
@@ -0,0 +1,58 @@
+import asyncio
+import pytest
+from ranked_choice_voting import Candidate, Election
+from ranked_choice_voting_intake import IntakePipeline, fake_scanner, file_source, stream_source
+
+CANDIDATES = ["Alice", "Bob", "Charlie"]
+
+def new_election():
+    election = Election([Candidate(name) for name in CANDIDATES])
+    election.warn_incomplete_ballots = False
+    return election
+
+def test_pipeline_merges_sources(tmp_path):
+    path = tmp_path / "ballots.txt"
+    path.write_text("Alice, Bob\n[\"Bob\", \"Charlie\"]\nAlice, Dave\n\n[broken\n[[\"Alice\"]]\n")
+
+    async def main():
+        reader = asyncio.StreamReader()
+        reader.feed_data(b"Charlie, Alice\nCharlie\n")
+        reader.feed_eof()
+        pipeline = IntakePipeline(election, queue_size=1)
+        sources = [fake_scanner(CANDIDATES, 2500, batch_size=100, seed=1),
+                   file_source(str(path), batch_size=2),
+                   stream_source(reader)]
+        return await pipeline.run(sources)
+
+    election = new_election()
+    metrics = asyncio.run(main())
+    assert metrics.received == 2500 + 6 + 2
+    assert metrics.parse_errors == 2
+    assert metrics.invalid == 2
+    assert metrics.accepted == election.ballot_count() == 2500 + 4
+    assert metrics.throughput() > 0
+
+def test_same_result_as_direct_ingestion():
+    async def collect():
+        return [batch async for batch in fake_scanner(CANDIDATES, 300, batch_size=64, seed=4)]
+
+    direct = new_election()
+    for batch in asyncio.run(collect()):
+        for line in batch:
+            direct.add_ballot([name.strip() for name in line.split(",")])
+    election = new_election()
+    asyncio.run(IntakePipeline(election).run([fake_scanner(CANDIDATES, 300, batch_size=64, seed=4)]))
+    assert list(election.first_choice_counts) == list(direct.first_choice_counts)
+    assert election.run_election() == direct.run_election()
+
+def test_failing_stage_cancels_sources():
+    class Broken(Election):
+        def add_ballot(self, rankings, count=1):
+            raise RuntimeError("storage failed")
+
+    async def main():
+        pipeline = IntakePipeline(Broken([Candidate(name) for name in CANDIDATES]), queue_size=1)
+        await asyncio.wait_for(pipeline.run([fake_scanner(CANDIDATES, 10000, batch_size=10)]), timeout=5)
+
+    with pytest.raises(RuntimeError, match="storage failed"):
+        asyncio.run(main())
@@ -0,0 +1,51 @@
+import itertools
+import random
+from array import array
+import pytest
+from ranked_choice_voting import Candidate, Election
+
+np = pytest.importorskip("numpy")
+from ranked_choice_voting_audit import BallotStore
+from ranked_choice_voting_montecarlo import BatchTabulator, polling_counts, simulate
+
+def all_rankings(candidates):
+    return [list(ranking) for length in range(1, candidates + 1)
+            for ranking in itertools.permutations(range(candidates), length)]
+
+def test_matches_run_election_including_ties():
+    rng = random.Random(11)
+    for candidates in (2, 3, 4):
+        names = [f"C{i}" for i in range(candidates)]
+        rankings = all_rankings(candidates)
+        tabulator = BatchTabulator(names, rankings)
+        counts = np.zeros((200, len(rankings)), dtype=np.int64)
+        for row in counts:
+            for _ in range(rng.randint(1, 9)):
+                row[rng.randrange(len(rankings))] += 1
+        winners, orders, margins, closest, _ = tabulator.tabulate(counts)
+        store = BallotStore(names, [array('H', ranking) for ranking in rankings], [1] * len(rankings))
+        for s, row in enumerate(counts):
+            election = Election([Candidate(name) for name in names])
+            election.warn_incomplete_ballots = False
+            for ranking, count in zip(rankings, row):
+                if count:
+                    election.add_ballot([names[i] for i in ranking], int(count))
+            expected = election.run_election()
+            assert (names[winners[s]] if winners[s] >= 0 else "No winner") == expected
+            assert list(orders[s]) == election.elimination_order()
+            _, _, margin, gap = store.tabulate(row)
+            assert (np.isnan(margins[s]) and margin is None) or margins[s] == margin
+            assert (np.isnan(closest[s]) and gap is None) or closest[s] == gap
+
+def test_simulate_in_parallel():
+    names = ["A", "B", "C"]
+    rankings = [[0, 1], [1, 2], [2, 1], [1]]
+    tabulator = BatchTabulator(names, rankings)
+    counts = polling_counts([40, 25, 30, 5], 1000, 300, concentration=200, seed=1)
+    assert counts.shape == (300, 4) and (counts.sum(axis=1) == 1000).all()
+    serial = simulate(tabulator, counts, processes=1, batch_size=100)
+    pooled = simulate(tabulator, counts, processes=2, batch_size=100)
+    assert serial.to_dict() == pooled.to_dict()
+    frequencies = serial.winner_frequencies()
+    assert sum(frequencies.values()) == pytest.approx(1.0)
+    assert frequencies["B"] > frequencies["A"]
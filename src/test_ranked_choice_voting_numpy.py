@@ -0,0 +1,49 @@
+import json
+import random
+from pathlib import Path
+import pytest
+from ranked_choice_voting import Candidate, Election
+
+np = pytest.importorskip("numpy")
+from ranked_choice_voting_numpy import ArrayElection
+
+SAMPLE = Path(__file__).with_name("dilbert_election.json")
+
+def tabulate(election_class, candidates, ballots):
+    election = election_class([Candidate(name) for name in candidates])
+    for ballot in ballots:
+        election.add_ballot(ballot)
+    winner = election.run_election()
+    rounds = [({c.name: v for c, v in r.vote_counts.items()}, r.eliminated_candidate, r.is_tie, r.tie_broken)
+              for r in election.rounds]
+    return winner, rounds
+
+def test_matches_election_on_sample_file():
+    with open(SAMPLE) as f:
+        data = json.load(f)
+    assert tabulate(ArrayElection, data["candidates"], data["ballots"]) == \
+        tabulate(Election, data["candidates"], data["ballots"])
+
+def test_matches_election_on_random_truncated_ballots():
+    rng = random.Random(7)
+    for _ in range(100):
+        candidates = [f"C{i}" for i in range(rng.randint(2, 6))]
+        ballots = [rng.sample(candidates, rng.randint(1, len(candidates)))
+                   for _ in range(rng.randint(0, 30))]
+        assert tabulate(ArrayElection, candidates, ballots) == tabulate(Election, candidates, ballots)
+
+def test_round_stats_match_election():
+    rng = random.Random(5)
+    candidates = ["A", "B", "C", "D"]
+    ballots = [rng.sample(candidates, rng.randint(1, 4)) for _ in range(60)]
+    stats = []
+    for election_class in (ArrayElection, Election):
+        election = election_class([Candidate(name) for name in candidates])
+        election.warn_incomplete_ballots = False
+        for ballot in ballots:
+            election.add_ballot(ballot)
+        election.collect_stats = True
+        election.run_election()
+        stats.append([(r.stats.ballots_touched, r.stats.piles_touched, r.stats.ballots_exhausted)
+                      for r in election.rounds])
+    assert stats[0] == stats[1]
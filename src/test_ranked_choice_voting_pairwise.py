@@ -0,0 +1,34 @@
+import itertools
+import random
+from ranked_choice_voting import Candidate, Election
+from ranked_choice_voting_pairwise import find_spoilers
+
+def build(candidates, ballots):
+    election = Election([Candidate(name) for name in candidates])
+    election.warn_incomplete_ballots = False
+    for ballot in ballots:
+        election.add_ballot(ballot)
+    return election
+
+def test_matrix_matches_naive_count_and_updates_incrementally():
+    rng = random.Random(5)
+    candidates = ["A", "B", "C", "D"]
+    ballots = [rng.sample(candidates, rng.randint(1, 4)) for _ in range(60)]
+    election = build(candidates, ballots[:30])
+    matrix = election.enable_pairwise()
+    for ballot in ballots[30:]:
+        election.add_ballot(ballot)
+    for a, b in itertools.permutations(candidates, 2):
+        expected = sum(1 for ballot in ballots
+                       if a in ballot and (b not in ballot or ballot.index(a) < ballot.index(b)))
+        assert matrix.to_dict()[a][b] == expected
+
+def test_condorcet_and_spoilers():
+    # Center squeeze: B beats everyone head to head but is eliminated first under IRV
+    ballots = [["A", "B", "C"]] * 8 + [["C", "B", "A"]] * 7 + [["B", "A", "C"]] * 3 + [["B", "C", "A"]] * 3
+    election = build(["A", "B", "C"], ballots)
+    matrix = election.enable_pairwise()
+    assert matrix.condorcet_winner().name == "B"
+    assert matrix.condorcet_loser().name == "C"
+    assert election.run_election() == "A"
+    assert find_spoilers(election) == {"C": "B"}
@@ -0,0 +1,48 @@
+import json
+import random
+from pathlib import Path
+from ranked_choice_voting import Candidate, Election
+from ranked_choice_voting_parallel import ParallelElection
+
+SAMPLE = Path(__file__).with_name("dilbert_election.json")
+
+def tabulate(election):
+    winner = election.run_election()
+    return winner, [({c.name: v for c, v in r.vote_counts.items()}, r.eliminated_candidate,
+                     r.is_tie, r.tie_broken) for r in election.rounds]
+
+def build(election_class, candidates, ballots, **kwargs):
+    election = election_class([Candidate(name) for name in candidates], **kwargs)
+    for ballot in ballots:
+        election.add_ballot(ballot)
+    return election
+
+def test_matches_election():
+    with open(SAMPLE) as f:
+        data = json.load(f)
+    rng = random.Random(3)
+    cases = [(data["candidates"], data["ballots"])]
+    for _ in range(20):
+        candidates = [f"C{i}" for i in range(rng.randint(2, 6))]
+        cases.append((candidates, [rng.sample(candidates, rng.randint(1, len(candidates)))
+                                   for _ in range(rng.randint(0, 40))]))
+    for candidates, ballots in cases:
+        with build(ParallelElection, candidates, ballots, processes=3) as election:
+            assert tabulate(election) == tabulate(build(Election, candidates, ballots))
+
+def test_workers_stay_resident_between_runs():
+    with build(ParallelElection, ["A", "B", "C"], [["A"], ["B", "A"], ["C", "B"]] * 5,
+               processes=2) as election:
+        first = tabulate(election)
+        workers = list(election._workers)
+        assert tabulate(election) == first
+        assert election._workers == workers
+        assert election.loads == 1
+        # Piles move inside the workers, so movement isn't reported
+        election.collect_stats = True
+        tabulate(election)
+        assert election.rounds[0].stats.ballots_touched is None
+        # New piles are shipped on the next count
+        election.add_ballot(["C", "A"], count=10)
+        assert tabulate(election)[0] == "C"
+        assert election.loads == 2
@@ -0,0 +1,57 @@
+import json
+from pathlib import Path
+import pytest
+import ranked_choice_voting_stream
+from ranked_choice_voting_stream import stream_election
+
+def piles(election):
+    return {tuple(ballot.names(election.by_id)): ballot.count for ballot in election.ballots}
+
+@pytest.mark.parametrize("chunk_size", [1, 7])
+@pytest.mark.parametrize("filename", ["dilbert_election.json", "jacks.json", "my_first_election.json"])
+def test_json_stream_matches_json_load(filename, chunk_size, monkeypatch):
+    monkeypatch.setattr(ranked_choice_voting_stream, "CHUNK_SIZE", chunk_size)
+    path = Path(__file__).with_name(filename)
+    with open(path) as f:
+        data = json.load(f)
+    election = stream_election(str(path))
+    assert list(election.candidates) == data["candidates"]
+    assert election.ballot_count() == len(data["ballots"])
+    expected = {}
+    for ballot in data["ballots"]:
+        expected[tuple(ballot)] = expected.get(tuple(ballot), 0) + 1
+    assert piles(election) == expected
+
+def test_json_lines_and_csv(tmp_path):
+    lines = tmp_path / "election.jsonl"
+    lines.write_text('{"candidates": ["Alice", "Bob"]}\n["Alice", "Bob"]\n'
+                     '{"ranking": ["Bob"], "count": 3}\n\n["Alice", "Bob"]\n')
+    rows = tmp_path / "election.csv"
+    rows.write_text("Alice,Bob\nAlice,Bob\nBob,\nBob,\nAlice,Bob\nBob,\n")
+    assert piles(stream_election(str(lines))) == {("Alice", "Bob"): 2, ("Bob",): 3}
+    assert piles(stream_election(str(rows))) == {("Alice", "Bob"): 2, ("Bob",): 3}
+
+    broken = tmp_path / "broken.jsonl"
+    broken.write_text('{"candidates": ["Alice", "Bob"]}\n{"count": 2}\n')
+    with pytest.raises(ValueError, match="no ranking"):
+        stream_election(str(broken))
+
+def test_progress_and_key_order(tmp_path):
+    path = tmp_path / "election.json"
+    path.write_text(json.dumps({"candidates": ["A", "B"], "ballots": [["A"], ["B"], ["A", "B"]]}))
+    reports = []
+    stream_election(str(path), progress=reports.append, progress_every=2)
+    assert reports == [2, 3]
+    path.write_text(json.dumps({"ballots": [["A"]], "candidates": ["A", "B"]}))
+    with pytest.raises(ValueError, match="candidates before ballots"):
+        stream_election(str(path))
+
+def test_malformed_ballot_fails_without_reading_on(tmp_path):
+    path = tmp_path / "election.json"
+    path.write_text('{"candidates": ["A", "B"], "ballots": [["A",,"B"], ' + '["A", "B"], ' * 100000 + '["B"]]}')
+    with open(path) as f:
+        records = ranked_choice_voting_stream._json_records(f)
+        next(records)
+        with pytest.raises(json.JSONDecodeError):
+            next(records)
+        assert f.tell() <= 2 * ranked_choice_voting_stream.CHUNK_SIZE
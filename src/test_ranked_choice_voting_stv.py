@@ -0,0 +1,35 @@
+import pytest
+from ranked_choice_voting import Candidate
+from ranked_choice_voting_stv import STVElection, droop_quota
+from ranked_choice_voting_synthetic import generate_election
+
+def build(ballots, candidates=("A", "B", "C", "D")):
+    election = STVElection([Candidate(name) for name in candidates])
+    election.warn_incomplete_ballots = False
+    for ranking, count in ballots.items():
+        election.add_ballot(ranking, count)
+    return election
+
+BALLOTS = {("A", "B"): 60, ("B",): 20, ("C",): 26, ("D", "C"): 15}
+
+def test_gregory_surplus_transfer():
+    election = build(BALLOTS)
+    assert droop_quota(121, 2) == 41
+    assert election.run_stv(2) == ["A", "C"]
+    first, second = election.rounds[:2]
+    assert first.elected_candidate == "A"
+    # A's surplus of 19 moves to B at a transfer value of 19/60
+    assert {c.name: v for c, v in second.vote_counts.items()} == {"A": 41, "B": 39, "C": 26, "D": 15}
+    assert second.eliminated_candidate == "D"
+
+def test_meek_matches_on_simple_race():
+    assert build(BALLOTS).run_stv(2, method="meek") == ["A", "C"]
+    with pytest.raises(ValueError):
+        build(BALLOTS).run_stv(2, method="hare")
+
+def test_single_seat_matches_irv():
+    for seed in range(5):
+        election = generate_election(6, 3000, seed=seed, truncation=0.3, election_class=STVElection)
+        winner = election.run_election()
+        assert election.run_stv(1) == [winner]
+        assert election.run_stv(1, method="meek") == [winner]
@@ -0,0 +1,34 @@
+import json
+from pathlib import Path
+from ranked_choice_voting_stream import stream_election
+from ranked_choice_voting_summary import BallotSummary, summarize_files
+
+SAMPLE = Path(__file__).with_name("dilbert_election.json")
+
+def rounds(election):
+    winner = election.run_election()
+    return winner, [({c.name: v for c, v in r.vote_counts.items()}, r.eliminated_candidate)
+                    for r in election.rounds]
+
+def test_merged_precincts_match_single_count(tmp_path):
+    with open(SAMPLE) as f:
+        data = json.load(f)
+    filenames = []
+    for precinct in range(3):
+        path = tmp_path / f"precinct{precinct}.json"
+        path.write_text(json.dumps({"candidates": data["candidates"],
+                                    "ballots": data["ballots"][precinct::3]}))
+        filenames.append(str(path))
+    merged = summarize_files(filenames, processes=2)
+    assert merged.ballot_count() == len(data["ballots"])
+    assert rounds(merged.to_election()) == rounds(stream_election(str(SAMPLE)))
+
+def test_serialization_and_candidate_union():
+    east = BallotSummary(["Alice", "Bob"])
+    east.add_ballot(["Alice", "Bob"], count=4)
+    west = BallotSummary(["Bob", "Carol", "Alice"])
+    west.add_ballot(["Carol"], count=2)
+    west.add_ballot(["Alice", "Bob"])
+    merged = BallotSummary.loads(east.dumps()).merge(BallotSummary.loads(west.dumps()))
+    assert merged.candidates == ["Alice", "Bob", "Carol"]
+    assert merged.piles == {("Alice", "Bob"): 5, ("Carol",): 2}
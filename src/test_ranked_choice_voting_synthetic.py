@@ -0,0 +1,26 @@
+import json
+from benchmark_ranked_choice_voting import find_regressions, main
+from ranked_choice_voting_synthetic import (candidate_names, generate_election,
+                                            plackett_luce_electorate, spatial_electorate)
+
+def test_generators_are_seeded_and_truncate():
+    names = candidate_names(6)
+    for model in (spatial_electorate, plackett_luce_electorate):
+        first = list(model(names, 200, seed=5, truncation=0.5))
+        assert first == list(model(names, 200, seed=5, truncation=0.5))
+        assert first != list(model(names, 200, seed=6, truncation=0.5))
+        assert all(sorted(r) == sorted(set(r)) and set(r) <= set(names) for r in first)
+        assert any(len(r) < 6 for r in first) and any(len(r) == 6 for r in first)
+
+def test_generate_election_aggregates_in_chunks():
+    election = generate_election(4, 1000, model="spatial", seed=1, chunk_size=64)
+    assert election.ballot_count() == 1000
+    assert len(election.ballots) < 1000
+
+def test_benchmark_records_results_and_flags_regressions(tmp_path):
+    results = tmp_path / "results.json"
+    assert main(["--results", str(results), "--no-memory"]) == 0
+    run = json.loads(results.read_text())["runs"][0]
+    assert run["suite"] == "quick" and len(run["results"]) == 3
+    slower = {name: dict(r, run_election=r["run_election"] + 1) for name, r in run["results"].items()}
+    assert len(find_regressions(run["results"], slower, 0.2)) == 3
@@ -0,0 +1,44 @@
+import itertools
+import random
+from ranked_choice_voting import Candidate, Election, first_choices, make_tie_break
+from ranked_choice_voting_whatif import WhatIfAnalysis
+
+def build(candidates, ballots, tie_break=None, bulk_elimination=False):
+    election = Election([Candidate(name) for name in candidates])
+    election.warn_incomplete_ballots = False
+    election.tie_break = tie_break
+    election.bulk_elimination = bulk_elimination
+    for ballot in ballots:
+        if ballot:
+            election.add_ballot(ballot)
+    return election
+
+def summarize(winner, rounds):
+    return winner, [({c.name: v for c, v in r.vote_counts.items()}, r.eliminated_candidate,
+                     r.is_tie, r.tie_broken) for r in rounds]
+
+def test_matches_recount_without_withdrawn_candidates():
+    rng = random.Random(11)
+    rules = [{}, {"tie_break": make_tie_break(first_choices)}, {"bulk_elimination": True}]
+    for trial in range(60):
+        rule = rules[trial % len(rules)]
+        candidates = [f"C{i}" for i in range(rng.randint(2, 6))]
+        ballots = [rng.sample(candidates, rng.randint(1, len(candidates)))
+                   for _ in range(rng.randint(1, 40))]
+        analysis = WhatIfAnalysis(build(candidates, ballots, **rule))
+        scenarios = [()] + [(c,) for c in candidates] + list(itertools.combinations(candidates, 2))
+        for excluded in scenarios:
+            remaining = [c for c in candidates if c not in excluded]
+            fresh = build(remaining, [[c for c in b if c not in excluded] for b in ballots], **rule)
+            winner = fresh.run_election()
+            assert summarize(*analysis.outcome(excluded)) == summarize(winner, fresh.rounds)
+
+def test_sweep_reuses_elimination_states():
+    candidates = ["A", "B", "C", "D", "E"]
+    ballots = [["A", "B"]] * 9 + [["B", "C"]] * 7 + [["C", "D"]] * 5 + [["D", "E"]] * 3 + [["E", "A"]] * 2
+    analysis = WhatIfAnalysis(build(candidates, ballots))
+    analysis.outcome()
+    misses = analysis.misses
+    sweep = analysis.withdrawal_sweep()
+    assert sweep["A"] == "B" and sweep["E"] == build(candidates, ballots).run_election()
+    assert analysis.hits > 0 and analysis.misses - misses < len(candidates) * (len(candidates) - 1)